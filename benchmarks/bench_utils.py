@@ -0,0 +1,92 @@
+"""Small helpers shared by the benchmark and load-test scripts."""
+
+import numpy as np
+import threading
+import resource
+import time
+import sys
+
+
+def summarize_latencies(samples: list) -> dict:
+    """Summarize latency samples given in seconds.
+
+    Returns:
+        dict: count, mean, p50, p95, p99 and max, in milliseconds.
+    """
+    if not samples:
+        return {"count": 0, "mean_ms": None, "p50_ms": None, "p95_ms": None, "p99_ms": None, "max_ms": None}
+    values = np.asarray(samples, dtype=float) * 1000.0
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {
+        "count": int(values.size),
+        "mean_ms": round(float(values.mean()), 3),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "max_ms": round(float(values.max()), 3),
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of the current process in MiB (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        peak = peak / 1024
+    return round(peak / 1024, 2)
+
+
+def current_rss_mb() -> float:
+    """Current resident set size in MiB (Linux /proc); falls back to the peak elsewhere."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            resident_pages = int(f.read().split()[1])
+        return round(resident_pages * resource.getpagesize() / (1024 * 1024), 2)
+    except (OSError, ValueError, IndexError):
+        return peak_rss_mb()
+
+
+class CallProbe:
+    """Wraps a callable to record call durations and how many calls overlapped.
+
+    Comparing the mean duration under load with the single-threaded mean shows how
+    much a call slows down when it competes for the GIL or library-internal locks.
+    """
+
+    def __init__(self, func):
+        self.func = func
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.durations = []
+        self.overlapped = 0
+
+    def __call__(self, *args, **kwargs):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            self.overlapped += int(self.in_flight > 1)
+        start = time.perf_counter()
+        try:
+            return self.func(*args, **kwargs)
+        finally:
+            duration = time.perf_counter() - start
+            with self._lock:
+                self.in_flight -= 1
+                self.durations.append(duration)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.durations = []
+            self.overlapped = 0
+            self.max_in_flight = self.in_flight
+
+    def stats(self, solo_mean_s: float = None) -> dict:
+        durations = list(self.durations)
+        result = {
+            **summarize_latencies(durations),
+            "overlap_rate": round(self.overlapped / len(durations), 4) if durations else 0.0,
+            "max_in_flight": self.max_in_flight,
+        }
+        if solo_mean_s and durations:
+            result["slowdown_vs_solo"] = round(float(np.mean(durations)) / solo_mean_s, 3)
+        return result
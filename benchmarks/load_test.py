@@ -0,0 +1,286 @@
+"""Load test: many concurrent simulated recruiter sessions against one node.
+
+Every session is its own `Assistant` (its own conversation state) sharing one
+`RAGModel` and one stubbed `FakeChatModel`, as sessions of one serving process
+do. A session asks questions from a corpus, waits a think time drawn from the
+chosen distribution between turns, and records per-turn latency.
+
+The run is repeated for each concurrency level in `--sessions` and reports, per
+level: throughput, turn latency percentiles, per-stage percentiles (embedding,
+vector_query, answer_llm, ...), memory growth per session and contention in the
+retrieval path: how often embedding and vector queries overlap and how much they
+slow down compared to a single session. Chroma's and the embedding library's
+internal locks are not observable, so the slowdown is the contention measure. The
+summary names the highest level whose p99 stays within `--p99-degradation`
+times the p99 of the first level.
+
+Usage (after `pip install -e .`):
+    python benchmarks/load_test.py --sessions 1,8,32,64 --duration 60 --think-time exponential --think-time-mean 2 --llm-latency 0.8
+    python benchmarks/load_test.py --vectordb-path /data/vectordb --collection my_embeddings --questions questions.txt
+"""
+
+import os
+
+# The GitHub scraper is imported by the package __init__ and requires a token; it is never called here.
+os.environ.setdefault("TOKEN_GITHUB", "benchmark-placeholder")
+
+from rag_assisted_bots.ask_github.build_vectordb import GithubBuildVectorDB
+from rag_assisted_bots.ask_github.llm_backends import FakeChatModel
+from rag_assisted_bots.ask_github.main import RAGModel, Assistant
+from rag_assisted_bots.ask_github import config
+from synthetic_corpus import generate_corpus, generate_questions
+from bench_utils import summarize_latencies, current_rss_mb, peak_rss_mb, CallProbe
+import threading
+import argparse
+import platform
+import tempfile
+import random
+import math
+import json
+import time
+import gc
+
+
+THINK_TIME_DISTRIBUTIONS = ("constant", "uniform", "exponential", "lognormal")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Drive Assistant with concurrent simulated recruiter sessions.")
+    parser.add_argument("--sessions", default="1,4,16,32", help="comma separated concurrency levels")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per level, ramp-up included")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="seconds over which sessions start; turns started earlier are not measured")
+    parser.add_argument("--think-time", choices=THINK_TIME_DISTRIBUTIONS, default="exponential")
+    parser.add_argument("--think-time-mean", type=float, default=1.0, help="mean think time between turns in seconds")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="FakeChatModel latency per LLM call in seconds")
+    parser.add_argument("--llm-jitter", type=float, default=0.2, help="FakeChatModel extra random latency in seconds")
+    parser.add_argument("--llm-tokens-per-second", type=float, default=0.0, help="FakeChatModel streaming speed, 0 = instant")
+    parser.add_argument("--questions", default=None, help="question corpus, one question per line (default: synthetic questions)")
+    parser.add_argument("--n-questions", type=int, default=200, help="synthetic questions to generate")
+    parser.add_argument("--vectordb-path", default=None, help="existing Chroma database (default: build a synthetic one)")
+    parser.add_argument("--collection", default="github", help="collection (alias) to query")
+    parser.add_argument("--assistant-type", default="github", choices=("github", "medium"))
+    parser.add_argument("--repos", type=int, default=30, help="synthetic README documents when building a database")
+    parser.add_argument("--solo-calls", type=int, default=20, help="single-session turns used as the contention baseline")
+    parser.add_argument("--p99-degradation", type=float, default=2.0, help="p99 factor over the first level counted as degraded")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", default=None, help="corpus and vectordb folder (default: temporary)")
+    parser.add_argument("--output", default="load_test_results.json")
+    return parser.parse_args()
+
+
+def load_questions(args) -> list:
+    if args.questions:
+        with open(args.questions, "r", encoding="utf-8") as f:
+            questions = [line.strip() for line in f if line.strip()]
+        if not questions:
+            raise ValueError(f"No questions found in {args.questions}")
+        return questions
+    return generate_questions(args.n_questions, seed=args.seed)
+
+
+def think_time_sampler(kind: str, mean: float):
+    """Return fn(rng) -> think time in seconds with the given distribution and mean."""
+    if mean <= 0:
+        return lambda rng: 0.0
+    if kind == "constant":
+        return lambda rng: mean
+    if kind == "uniform":
+        return lambda rng: rng.uniform(0.0, 2.0 * mean)
+    if kind == "exponential":
+        return lambda rng: rng.expovariate(1.0 / mean)
+    sigma = 1.0
+    mu = math.log(mean) - sigma ** 2 / 2.0
+    return lambda rng: rng.lognormvariate(mu, sigma)
+
+
+def build_collection(args, workdir: str) -> str:
+    """Generate a synthetic corpus and publish it as the `--collection` alias."""
+    corpus = generate_corpus(workdir, n_repos=args.repos, n_articles=0, seed=args.seed)
+    vectordb_path = os.path.join(workdir, "vectordb")
+    builder = GithubBuildVectorDB(
+        directory_path=corpus["github"],
+        vectordb_path=vectordb_path,
+        metadatas_path=corpus["metadata"],
+        embedding_model_name=config.EMBEDDING_MODEL_NAME,
+        collection_name=args.collection,
+    )
+    chunks, document_names = builder.split_documents(builder.load_documents())
+    builder.build(chunks, builder.chunk_metadatas(document_names, source="github"), source="github")
+    return vectordb_path
+
+
+def install_call_probes(rag_model: RAGModel) -> dict:
+    """Wrap the retrieval calls of the shared RAGModel to time them under concurrency."""
+    probes = {
+        "retrieval": CallProbe(rag_model.ask),
+        "profile_retrieval": CallProbe(rag_model.ask_profiles),
+        "embedding": CallProbe(rag_model.asker.generate_embeddings),
+        "vector_query": CallProbe(rag_model.asker.find_relevant_chunks),
+    }
+    rag_model.ask = probes["retrieval"]
+    rag_model.ask_profiles = probes["profile_retrieval"]
+    rag_model.asker.generate_embeddings = probes["embedding"]
+    rag_model.asker.find_relevant_chunks = probes["vector_query"]
+    return probes
+
+
+def new_assistant(args, vectordb_path: str, rag_model: RAGModel, model: FakeChatModel) -> Assistant:
+    return Assistant(
+        gpt_model_name=config.GPT_MODEL_NAME,
+        temperature=0,
+        collection_name=args.collection,
+        vectordb_path=vectordb_path,
+        rag_activated=True,
+        assistant_type=args.assistant_type,
+        model=model,
+        rag_model=rag_model,
+    )
+
+
+def run_session(session_id: int, assistant: Assistant, questions: list, sample_think_time, start_at: float, deadline: float, turns: list, errors: list, seed: int) -> None:
+    rng = random.Random(seed * 100003 + session_id)
+    time.sleep(max(0.0, start_at - time.perf_counter()))
+    while True:
+        think = sample_think_time(rng)
+        if time.perf_counter() + think >= deadline:
+            return
+        time.sleep(think)
+        question = rng.choice(questions)
+        start = time.perf_counter()
+        try:
+            result = assistant.chat_with_model(question, return_metrics=True)
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+            continue
+        turns.append((start, time.perf_counter(), result["metrics"]["stages_ms"], result["prompt_cache"]))
+
+
+def run_level(args, n_sessions: int, vectordb_path: str, rag_model: RAGModel, model: FakeChatModel, questions: list, call_probes: dict, solo_means: dict) -> dict:
+    for probe in call_probes.values():
+        probe.reset()
+    gc.collect()
+    rss_before = current_rss_mb()
+    assistants = [new_assistant(args, vectordb_path, rag_model, model) for _ in range(n_sessions)]
+
+    sample_think_time = think_time_sampler(args.think_time, args.think_time_mean)
+    turns, errors = [], []
+    start = time.perf_counter()
+    ramp_end = start + min(args.ramp_up, args.duration)
+    deadline = start + args.duration
+    threads = [
+        threading.Thread(
+            target=run_session,
+            args=(index, assistant, questions, sample_think_time, start + args.ramp_up * index / n_sessions, deadline, turns, errors, args.seed),
+            name=f"session-{index}",
+            daemon=True,
+        )
+        for index, assistant in enumerate(assistants)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    rss_after = current_rss_mb()
+
+    measured = [turn for turn in turns if turn[0] >= ramp_end]
+    window = max(elapsed - (ramp_end - start), 1e-9)
+    stage_samples = {}
+    for _, _, stages_ms, _ in measured:
+        for stage, ms in stages_ms.items():
+            stage_samples.setdefault(stage, []).append(ms / 1000.0)
+    input_tokens = sum(turn[3]["input_tokens"] for turn in measured)
+    cache_read_tokens = sum(turn[3]["cache_read_tokens"] for turn in measured)
+
+    return {
+        "sessions": n_sessions,
+        "turns": len(turns),
+        "measured_turns": len(measured),
+        "errors": len(errors),
+        "error_samples": errors[:5],
+        "throughput_turns_per_s": round(len(measured) / window, 3),
+        "latency": summarize_latencies([end - begin for begin, end, _, _ in measured]),
+        "stages": {stage: summarize_latencies(samples) for stage, samples in stage_samples.items()},
+        "prompt_cache_hit_rate": round(cache_read_tokens / input_tokens, 4) if input_tokens else 0.0,
+        "memory": {
+            "rss_before_mb": rss_before,
+            "rss_after_mb": rss_after,
+            "growth_per_session_kb": round((rss_after - rss_before) * 1024 / n_sessions, 2),
+        },
+        "retrieval_contention": {name: probe.stats(solo_means.get(name)) for name, probe in call_probes.items()},
+    }
+
+
+def measure_solo(args, vectordb_path: str, rag_model: RAGModel, model: FakeChatModel, questions: list, call_probes: dict) -> dict:
+    """Single-session turns without think time; the mean call durations are the contention baseline."""
+    assistant = new_assistant(args, vectordb_path, rag_model, model)
+    for question in questions[:args.solo_calls]:
+        assistant.chat_with_model(question)
+    means = {name: sum(probe.durations) / len(probe.durations) for name, probe in call_probes.items() if probe.durations}
+    return means
+
+
+def run(args) -> dict:
+    levels = sorted({int(level) for level in args.sessions.split(",") if level.strip()})
+    if not levels or levels[0] < 1:
+        raise ValueError("--sessions needs positive concurrency levels, e.g. 1,8,32")
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="rag_load_")
+    vectordb_path = args.vectordb_path or build_collection(args, workdir)
+    questions = load_questions(args)
+
+    rag_model = RAGModel(
+        vectordb_path=vectordb_path,
+        collection_name=args.collection,
+        embedding_model_name=config.EMBEDDING_MODEL_NAME,
+        profile_collection_name=f"{args.collection}{config.PROFILE_COLLECTION_SUFFIX}" if config.PROFILE_CARDS_ENABLED else None,
+    )
+    rag_model.build_config()
+    call_probes = install_call_probes(rag_model)
+    model = FakeChatModel(latency=args.llm_latency, latency_jitter=args.llm_jitter, tokens_per_second=args.llm_tokens_per_second, seed=args.seed, prompt_cache=True)
+
+    print("Measuring single-session baseline...")
+    solo_means = measure_solo(args, vectordb_path, rag_model, model, questions, call_probes)
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "vectordb_path": vectordb_path,
+            "questions": len(questions),
+            **{key: value for key, value in vars(args).items() if key not in ("workdir", "output", "vectordb_path")},
+        },
+        "solo_call_mean_ms": {name: round(mean * 1000.0, 3) for name, mean in solo_means.items()},
+        "levels": [],
+    }
+
+    for n_sessions in levels:
+        print(f"Running {n_sessions} concurrent sessions for {args.duration:.0f}s...")
+        level = run_level(args, n_sessions, vectordb_path, rag_model, model, questions, call_probes, solo_means)
+        results["levels"].append(level)
+        print(f"  {level['throughput_turns_per_s']} turns/s, p50 {level['latency']['p50_ms']} ms, p99 {level['latency']['p99_ms']} ms, errors {level['errors']}")
+
+    baseline_p99 = results["levels"][0]["latency"]["p99_ms"]
+    within = [
+        level["sessions"] for level in results["levels"]
+        if baseline_p99 is not None and level["latency"]["p99_ms"] is not None and level["latency"]["p99_ms"] <= baseline_p99 * args.p99_degradation
+    ]
+    results["summary"] = {
+        "baseline_p99_ms": baseline_p99,
+        "max_sessions_within_p99_budget": max(within) if within else None,
+        "peak_throughput_turns_per_s": max(level["throughput_turns_per_s"] for level in results["levels"]),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    return results
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = run(args)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+    print(json.dumps(results["summary"], indent=4))
+    print(f"Results written to {args.output}")
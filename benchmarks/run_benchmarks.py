@@ -0,0 +1,208 @@
+"""End-to-end benchmark for the ingestion and query paths.
+
+Generates a synthetic README / Medium corpus, builds one Chroma collection per
+source with `GithubBuildVectorDB`, then measures `RAGModel.ask` and
+`Assistant.chat_with_model` (with `FakeChatModel`, so no network is used).
+Results are written as JSON.
+
+Usage (after `pip install -e .`):
+    python benchmarks/run_benchmarks.py --repos 50 --articles 20 --queries 100 --output bench_results.json
+"""
+
+import os
+
+# The GitHub scraper is imported by the package __init__ and requires a token; it is never called here.
+os.environ.setdefault("TOKEN_GITHUB", "benchmark-placeholder")
+
+from rag_assisted_bots.ask_github.build_vectordb import GithubBuildVectorDB
+from rag_assisted_bots.ask_github.llm_backends import FakeChatModel
+from rag_assisted_bots.ask_github.embeddings import load_embedding_model, check_embedding_parity
+from rag_assisted_bots.ask_github.main import RAGModel, Assistant
+from rag_assisted_bots.ask_github import config
+from synthetic_corpus import generate_corpus, generate_questions
+from bench_utils import summarize_latencies, peak_rss_mb
+import argparse
+import platform
+import tempfile
+import json
+import time
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark ingestion and query paths on a synthetic corpus.")
+    parser.add_argument("--repos", type=int, default=20, help="number of synthetic README documents")
+    parser.add_argument("--articles", type=int, default=10, help="number of synthetic Medium articles")
+    parser.add_argument("--paragraphs", type=int, default=6, help="paragraphs per document")
+    parser.add_argument("--queries", type=int, default=50, help="number of measured queries per path")
+    parser.add_argument("--warmup", type=int, default=3, help="unmeasured queries before timing")
+    parser.add_argument("--chunk-size", type=int, default=200)
+    parser.add_argument("--chunk-overlap", type=int, default=200)
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="FakeChatModel latency in seconds")
+    parser.add_argument("--embedding-model", default=config.EMBEDDING_MODEL_NAME)
+    parser.add_argument("--embedding-backend", default=config.EMBEDDING_BACKEND, help="torch, onnx or onnx-int8")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", default=None, help="corpus and vectordb folder (default: temporary)")
+    parser.add_argument("--output", default="bench_results.json")
+    return parser.parse_args()
+
+
+def benchmark_ingestion(args, source: str, corpus: dict, vectordb_path: str) -> dict:
+    builder = GithubBuildVectorDB(
+        directory_path=corpus[source],
+        vectordb_path=vectordb_path,
+        metadatas_path=corpus["metadata"],
+        embedding_model_name=args.embedding_model,
+        collection_name=source,
+    )
+    start = time.perf_counter()
+    documents = builder.load_documents()
+    load_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    chunks, document_names = builder.split_documents(documents, chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap)
+    split_s = time.perf_counter() - start
+
+    texts = [str(chunk.page_content) for chunk in chunks]
+    metadatas = builder.chunk_metadatas(document_names, source=source)
+
+    start = time.perf_counter()
+    embeddings = builder.embed_texts(texts)
+    embed_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    builder.collection.add(
+        ids=[f"{source}-{index}" for index in range(len(texts))],
+        embeddings=embeddings,
+        documents=texts,
+        metadatas=metadatas,
+    )
+    index_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    builder.publish()
+    publish_s = time.perf_counter() - start
+
+    return {
+        "documents": len(documents),
+        "chunks": len(chunks),
+        "load_s": round(load_s, 4),
+        "split_s": round(split_s, 4),
+        "embed_s": round(embed_s, 4),
+        "index_s": round(index_s, 4),
+        "publish_s": round(publish_s, 4),
+        "documents_per_s": round(len(documents) / load_s, 2) if load_s else None,
+        "chunks_embedded_per_s": round(len(chunks) / embed_s, 2) if embed_s else None,
+        "chunks_indexed_per_s": round(len(chunks) / index_s, 2) if index_s else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def time_calls(func, questions: list, warmup: int) -> list:
+    for question in questions[:warmup]:
+        func(question)
+    samples = []
+    for question in questions:
+        start = time.perf_counter()
+        func(question)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def benchmark_query(args, source: str, vectordb_path: str, questions: list) -> dict:
+    rag_model = RAGModel(vectordb_path=vectordb_path, collection_name=source, embedding_model_name=args.embedding_model)
+    rag_model.build_config()
+    n_results = config.ADAPTIVE_MAX_K if config.ADAPTIVE_TOP_K else config.TOP_K_MATCHES
+    chosen_k = []
+
+    def ask(question):
+        documents, _ = rag_model.ask(question, n_results=n_results)
+        chosen_k.append(len(documents[0]))
+
+    samples = time_calls(ask, questions, args.warmup)
+    return {
+        **summarize_latencies(samples),
+        "adaptive_top_k": config.ADAPTIVE_TOP_K,
+        "mean_k": round(sum(chosen_k) / len(chosen_k), 2) if chosen_k else 0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def benchmark_chat(args, source: str, vectordb_path: str, questions: list) -> dict:
+    assistant = Assistant(
+        gpt_model_name=config.GPT_MODEL_NAME,
+        temperature=0,
+        collection_name=source,
+        vectordb_path=vectordb_path,
+        rag_activated=True,
+        assistant_type=source,
+        model=FakeChatModel(latency=args.llm_latency, seed=args.seed, prompt_cache=True),
+    )
+    input_tokens, cache_read_tokens = [], []
+
+    def chat(question):
+        prompt_cache = assistant.chat_with_model(question)["prompt_cache"]
+        input_tokens.append(prompt_cache["input_tokens"])
+        cache_read_tokens.append(prompt_cache["cache_read_tokens"])
+
+    samples = time_calls(chat, questions, args.warmup)
+    return {
+        **summarize_latencies(samples),
+        "llm_latency_s": args.llm_latency,
+        "mean_input_tokens": round(sum(input_tokens) / len(input_tokens), 1) if input_tokens else 0,
+        "prompt_cache_hit_rate": round(sum(cache_read_tokens) / sum(input_tokens), 4) if sum(input_tokens) else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def benchmark_embedding_parity(args, questions: list) -> dict:
+    """Compare the selected embedding backend with the torch reference on the benchmark questions."""
+    reference = load_embedding_model(args.embedding_model, backend="torch")
+    candidate = load_embedding_model(args.embedding_model, backend=args.embedding_backend)
+    return check_embedding_parity(reference, candidate, questions)
+
+
+def run(args) -> dict:
+    # Assistant builds its RAGModel from config, so the backend is selected there.
+    config.EMBEDDING_BACKEND = args.embedding_backend
+    workdir = args.workdir or tempfile.mkdtemp(prefix="rag_bench_")
+    vectordb_path = os.path.join(workdir, "vectordb")
+
+    corpus = generate_corpus(workdir, n_repos=args.repos, n_articles=args.articles, paragraphs=args.paragraphs, seed=args.seed)
+    questions = generate_questions(args.queries, seed=args.seed)
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "workdir": workdir,
+            **{key: value for key, value in vars(args).items() if key not in ("workdir", "output")},
+        },
+        "ingestion": {},
+        "query": {},
+        "chat": {},
+    }
+
+    for source in ("github", "medium"):
+        print(f"Benchmarking {source} ingestion...")
+        results["ingestion"][source] = benchmark_ingestion(args, source, corpus, vectordb_path)
+        print(f"Benchmarking {source} RAGModel.ask...")
+        results["query"][source] = benchmark_query(args, source, vectordb_path, questions)
+        print(f"Benchmarking {source} Assistant.chat_with_model...")
+        results["chat"][source] = benchmark_chat(args, source, vectordb_path, questions)
+
+    if args.embedding_backend != "torch":
+        print(f"Checking {args.embedding_backend} embeddings against torch...")
+        results["embedding_parity"] = benchmark_embedding_parity(args, questions)
+
+    results["peak_rss_mb"] = peak_rss_mb()
+    return results
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = run(args)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+    print(json.dumps(results, indent=4))
+    print(f"Results written to {args.output}")
@@ -0,0 +1,136 @@
+"""Deterministic synthetic GitHub README / Medium article corpora for benchmarks.
+
+Documents are written as PDFs (the same format the scrapers produce) together
+with a metadata store (see `MetadataStore`) as the scrapers write it.
+"""
+
+from rag_assisted_bots.ask_github.metadata_store import MetadataStore
+from xhtml2pdf import pisa
+import random
+import os
+
+
+TECHNOLOGIES = [
+    "Python", "FastAPI", "Flask", "Docker", "Kubernetes", "MLflow", "Airflow", "PyTorch",
+    "TensorFlow", "scikit-learn", "Pandas", "NumPy", "LangChain", "ChromaDB", "PostgreSQL",
+    "Redis", "GitHub Actions", "AWS", "Terraform", "Streamlit", "XGBoost", "Spark", "DVC",
+]
+
+TOPICS = [
+    "medical insurance cost prediction", "customer churn analysis", "retrieval augmented chatbot",
+    "credit risk scoring", "sentiment classification", "demand forecasting", "image classification",
+    "recommendation engine", "fraud detection", "resume screening", "time series anomaly detection",
+]
+
+WORDS = [
+    "model", "pipeline", "feature", "training", "deployment", "monitoring", "dataset", "api",
+    "evaluation", "container", "endpoint", "latency", "accuracy", "experiment", "tracking",
+    "preprocessing", "inference", "service", "dashboard", "versioning", "automation", "testing",
+]
+
+QUESTION_TEMPLATES = [
+    "Which projects use {tech}?",
+    "Tell me about his experience with {tech}.",
+    "Has he built a {topic} project?",
+    "How did he deploy the {topic} solution?",
+    "What tools did he use for {topic}?",
+    "Summarize his skills in {tech} and {tech2}.",
+]
+
+
+def _sentence(rng: random.Random, length: int = 14) -> str:
+    words = [rng.choice(WORDS + TECHNOLOGIES) for _ in range(length)]
+    return " ".join(words).capitalize() + "."
+
+
+def _paragraph(rng: random.Random, sentences: int = 5) -> str:
+    return " ".join(_sentence(rng) for _ in range(sentences))
+
+
+def _write_pdf(html: str, output_path: str) -> None:
+    with open(output_path, "wb") as pdf_file:
+        pisa.CreatePDF(f"<html><body>{html}</body></html>", dest=pdf_file)
+
+
+def generate_corpus(output_dir: str, n_repos: int = 20, n_articles: int = 10, paragraphs: int = 6, seed: int = 0) -> dict:
+    """Write a synthetic corpus to `output_dir`.
+
+    Args:
+        output_dir (str): Folder to write into. `github_pdfs/`, `medium_pdfs/` and `metadata.sqlite` are created.
+        n_repos (int): Number of README documents.
+        n_articles (int): Number of Medium articles.
+        paragraphs (int): Paragraphs per document; controls document size.
+        seed (int): Random seed, the same seed always gives the same corpus.
+
+    Returns:
+        dict: Paths of the generated folders and metadata file.
+    """
+    rng = random.Random(seed)
+    github_dir = os.path.join(output_dir, "github_pdfs")
+    medium_dir = os.path.join(output_dir, "medium_pdfs")
+    os.makedirs(github_dir, exist_ok=True)
+    os.makedirs(medium_dir, exist_ok=True)
+
+    metadata = {"github": [], "medium": []}
+
+    for index in range(n_repos):
+        topic = rng.choice(TOPICS)
+        techs = rng.sample(TECHNOLOGIES, 4)
+        repo_name = f"{topic.title().replace(' ', '-')}-{index}"
+        repo_url = f"https://github.com/synthetic-user/{repo_name}"
+        html = f"<h1>{repo_name}</h1><p>A {topic} project built with {', '.join(techs)}.</p>"
+        html += "".join(f"<h2>Section {p}</h2><p>{_paragraph(rng)}</p>" for p in range(paragraphs))
+        html += "<h2>Tech Stack</h2><ul>" + "".join(f"<li>{tech}</li>" for tech in techs) + "</ul>"
+        html += f"<p>Repository: {repo_url}</p>"
+        _write_pdf(html, os.path.join(github_dir, f"{repo_name}.pdf"))
+        metadata["github"].append({
+            "download_url": f"{repo_url}/README.md",
+            "repository_url": repo_url,
+            "repo_name": repo_name,
+            "created_at": "2025-01-01T00:00:00Z",
+            "updated_at": "2025-01-01T00:00:00Z",
+            "pushed_at": "2025-01-01T00:00:00Z",
+            "language": techs[0],
+            "full_name": f"synthetic-user/{repo_name}",
+            "private": False,
+            "description": f"{topic} with {techs[0]}",
+            "size": len(html),
+        })
+
+    for index in range(n_articles):
+        topic = rng.choice(TOPICS)
+        title = f"Lessons_from_a_{topic.replace(' ', '_')}_{index}"
+        link = f"https://medium.com/@synthetic-user/{title.lower()}"
+        html = f"<h1>{title}</h1>" + "".join(f"<p>{_paragraph(rng)}</p>" for _ in range(paragraphs))
+        _write_pdf(html, os.path.join(medium_dir, f"{title}.pdf"))
+        metadata["medium"].append({
+            "full_name": title,
+            "repo_name": title,
+            "created_at": "Wed, 01 Jan 2025 00:00:00 GMT",
+            "updated_at": "Wed, 01 Jan 2025 00:00:00 GMT",
+            "pushed_at": "Wed, 01 Jan 2025 00:00:00 GMT",
+            "download_url": link,
+            "repository_url": link,
+            "language": "English",
+            "private": False,
+            "description": topic,
+            "size": len(html),
+        })
+
+    metadata_path = os.path.join(output_dir, "metadata.sqlite")
+    store = MetadataStore(metadata_path)
+    for source, items in metadata.items():
+        store.replace_source(source, items)
+
+    return {"github": github_dir, "medium": medium_dir, "metadata": metadata_path}
+
+
+def generate_questions(n_questions: int = 50, seed: int = 0) -> list:
+    """Return `n_questions` recruiter-style questions built from the corpus vocabulary."""
+    rng = random.Random(seed)
+    questions = []
+    for _ in range(n_questions):
+        tech, tech2 = rng.sample(TECHNOLOGIES, 2)
+        template = rng.choice(QUESTION_TEMPLATES)
+        questions.append(template.format(tech=tech, tech2=tech2, topic=rng.choice(TOPICS)))
+    return questions
@@ -2,3 +2,11 @@ from rag_assisted_bots.ask_github.main import Assistant
 from rag_assisted_bots.ask_github.build_vectordb import GithubBuildVectorDB
 from rag_assisted_bots.ask_github.ask_vectordb import GithubAskToVectorDB
 from rag_assisted_bots.ask_github.github_scrapper import GithubScrapper
+from rag_assisted_bots.ask_github.llm_backends import FakeChatModel, build_chat_model
+from rag_assisted_bots.ask_github.metrics import PipelineMetrics, MetricsHook, CallbackMetricsHook, LoggingMetricsHook, OpenTelemetryMetricsHook
+from rag_assisted_bots.ask_github.embeddings import load_embedding_model, check_embedding_parity
+from rag_assisted_bots.ask_github.profile_cards import build_profile_card, is_broad_question
+from rag_assisted_bots.ask_github.federated_retriever import FederatedRetriever
+from rag_assisted_bots.ask_github.vectordb_access import SnapshotStore, get_client
+from rag_assisted_bots.ask_github.index_snapshot import IndexSnapshot, write_index_snapshot
+from rag_assisted_bots.ask_github.metadata_store import MetadataStore
@@ -1,22 +1,168 @@
 import chromadb
 from rag_assisted_bots.ask_github import config
 from chromadb.config import Settings
-from sentence_transformers import SentenceTransformer
+from rag_assisted_bots.ask_github.metrics import PipelineMetrics
+from rag_assisted_bots.ask_github.embeddings import get_shared_embedding_model
 from dotenv import load_dotenv
+from typing import Optional
+import numpy as np
 
 load_dotenv()
 
+
+def maximal_marginal_relevance(query_embedding, candidate_embeddings, k: int, lambda_mult: float = 0.5, groups: Optional[list] = None, max_per_group: Optional[int] = None) -> list:
+    """Select `k` candidates by maximal marginal relevance, optionally capping picks per group.
+
+    Each step picks the candidate maximizing
+    `lambda_mult * sim(query, c) - (1 - lambda_mult) * max(sim(c, already selected))`.
+    Similarities are cosine, computed once as matrix products; every step is a
+    vectorized update over all candidates.
+
+    Args:
+        query_embedding (array-like): Query vector, shape (d,).
+        candidate_embeddings (array-like): Candidate vectors, shape (n, d).
+        k (int): Number of candidates to select.
+        lambda_mult (float): Relevance / diversity trade-off.
+        groups (list): Optional group key per candidate (e.g. repo_name).
+        max_per_group (int): Maximum selected candidates per group; None means no cap.
+
+    Returns:
+        list: Selected candidate indices in selection order.
+    """
+    candidates = np.asarray(candidate_embeddings, dtype=np.float32)
+    if candidates.ndim != 2 or candidates.shape[0] == 0 or k <= 0:
+        return []
+    query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+
+    candidates = candidates / np.maximum(np.linalg.norm(candidates, axis=1, keepdims=True), 1e-12)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+    relevance = candidates @ query
+    pairwise = candidates @ candidates.T
+
+    n = candidates.shape[0]
+    available = np.ones(n, dtype=bool)
+    redundancy = np.full(n, -np.inf, dtype=np.float32)
+    group_ids = None
+    if groups is not None and max_per_group:
+        _, group_ids = np.unique(np.asarray([str(g) for g in groups]), return_inverse=True)
+        group_counts = np.zeros(group_ids.max() + 1, dtype=int)
+
+    selected = []
+    while len(selected) < min(k, n) and available.any():
+        if selected:
+            scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        else:
+            scores = relevance.copy()
+        scores[~available] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        available[best] = False
+        redundancy = np.maximum(redundancy, pairwise[best])
+
+        if group_ids is not None:
+            group_counts[group_ids[best]] += 1
+            if group_counts[group_ids[best]] >= max_per_group:
+                available &= group_ids != group_ids[best]
+
+    return selected
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token for English text)."""
+    return max(1, len(text) // 4) if text else 0
+
+
+def cosine_scores(query_embedding, embeddings) -> np.ndarray:
+    """Cosine similarity of every row of `embeddings` to the query."""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if embeddings.ndim != 2 or embeddings.shape[0] == 0:
+        return np.zeros(0, dtype=np.float32)
+    query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+    return (embeddings @ query) / np.maximum(np.linalg.norm(embeddings, axis=1), 1e-12)
+
+
+def adaptive_top_k(scores: list, documents: list, min_k: int = None, min_score: float = None, max_score_gap: float = None, token_budget: int = None) -> tuple:
+    """Choose how many of the ranked chunks to keep.
+
+    Chunks are walked in descending score order; the walk stops at the first chunk
+    whose score is below `min_score`, whose score is more than `max_score_gap` below
+    the previous one, or which would push the context past `token_budget`. The
+    first `min_k` chunks are always kept (the token budget still applies after the first).
+
+    Args:
+        scores (list): Cosine similarity of each chunk to the question, sorted descending.
+        documents (list): Chunk texts in the same order.
+        min_k (int): Chunks always kept. Defaults to config.ADAPTIVE_MIN_K.
+        min_score (float): Score threshold; None disables it. Defaults to config.ADAPTIVE_MIN_SCORE.
+        max_score_gap (float): Largest allowed drop between neighbours; None disables it. Defaults to config.ADAPTIVE_MAX_SCORE_GAP.
+        token_budget (int): Context token cap; None disables it. Defaults to config.ADAPTIVE_CONTEXT_TOKEN_BUDGET.
+
+    Returns:
+        tuple: (k, reason) where reason is "min_score", "score_gap", "token_budget" or "max_k".
+    """
+    min_k = config.ADAPTIVE_MIN_K if min_k is None else min_k
+    min_score = config.ADAPTIVE_MIN_SCORE if min_score is None else min_score
+    max_score_gap = config.ADAPTIVE_MAX_SCORE_GAP if max_score_gap is None else max_score_gap
+    token_budget = config.ADAPTIVE_CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget
+
+    tokens = 0
+    for index, (score, document) in enumerate(zip(scores, documents)):
+        tokens += estimate_tokens(document or "")
+        if index == 0:
+            continue
+        if token_budget is not None and tokens > token_budget:
+            return index, "token_budget"
+        if index < min_k:
+            continue
+        if min_score is not None and score < min_score:
+            return index, "min_score"
+        if max_score_gap is not None and scores[index - 1] - score > max_score_gap:
+            return index, "score_gap"
+    return len(scores), "max_k"
+
+
+def select_rows(result: dict, rows: list, keys: tuple = ("ids", "documents", "metadatas", "distances")) -> dict:
+    """Keep only `rows` (in that order) of a single-query Chroma-shaped result."""
+    return {key: [[result[key][0][index] for index in rows]] if result.get(key) is not None else None for key in keys}
+
+
+def apply_adaptive_top_k(query_embedding, result: dict, metrics: PipelineMetrics = None, scores: list = None) -> dict:
+    """Rank the chunks of a single-query result by cosine similarity and keep the adaptive top-k.
+
+    Args:
+        query_embedding (array-like): The query vector.
+        result (dict): Chroma-shaped result; needs "embeddings" unless `scores` is given.
+        metrics (PipelineMetrics): Receives retrieval "k_candidates", "k" and "k_cutoff" (the reason retrieval stopped).
+        scores (list): Precomputed cosine similarities, one per chunk.
+
+    Returns:
+        dict: Chroma-shaped result without embeddings, best chunk first.
+    """
+    scores = cosine_scores(query_embedding, result["embeddings"][0]) if scores is None else np.asarray(scores, dtype=np.float32)
+    order = np.argsort(-scores, kind="stable").tolist()
+    k, reason = adaptive_top_k(scores[order].tolist(), [result["documents"][0][index] for index in order])
+    if metrics is not None:
+        metrics.record("retrieval", "k_candidates", len(order))
+        metrics.record("retrieval", "k", k)
+        metrics.record("retrieval", "k_cutoff", reason)
+    return select_rows(result, order[:k])
+
+
 class GithubAskToVectorDB:
     """Helper to query a Chroma collection using SentenceTransformer embeddings.
 
     Args:
         collection (chromadb.api.models.Collection): A Chroma collection to query.
-        embedding_model (SentenceTransformer): Model used to embed queries.
+        embedding_model_name (str): SentenceTransformer model used to embed queries.
+        embedding_backend (str): "torch", "onnx" or "onnx-int8"; defaults to config.EMBEDDING_BACKEND.
+        embedding_model (SentenceTransformer): Already loaded model to share between askers; skips loading.
     """
 
-    def __init__(self, collection: chromadb.api.models.Collection, embedding_model_name: str):
+    def __init__(self, collection: chromadb.api.models.Collection, embedding_model_name: str, embedding_backend: str = None, embedding_model=None):
         self.collection = collection
-        self.embedding_model = SentenceTransformer(embedding_model_name)
+        self.embedding_model = embedding_model if embedding_model is not None else get_shared_embedding_model(embedding_model_name, backend=embedding_backend)
 
 
     def generate_embeddings(self, query: str) -> list:
@@ -36,39 +182,123 @@ class GithubAskToVectorDB:
         
 
 
-    def find_relevant_chunks(self, query_embeddings: list, n_results: int = 5) -> list:
+    def find_relevant_chunks(self, query_embeddings: list, n_results: int = 5, include: list = None) -> list:
         """Query the collection using pre-computed embeddings and return results.
 
         Args:
             query_embeddings (list): Embedding vector(s) to query with.
             n_results (int): Number of top results to return.
+            include (list): Optional Chroma `include` fields, e.g. ["documents", "metadatas", "distances", "embeddings"].
 
         Returns:
             list|dict: The raw result returned by the Chroma collection's query method.
         """
+        query_kwargs = {"include": include} if include else {}
         result = self.collection.query(
             query_embeddings=query_embeddings,
-            n_results=n_results
+            n_results=n_results,
+            **query_kwargs
         )
         return result
-    
 
 
-    def ask(self, query: str, n_results: int = 5):
-        """Embed a query and return top relevant chunks from the collection.
+    def diversify(self, query_embeddings: list, candidates: dict, n_results: int, lambda_mult: float, max_per_repo: Optional[int], include_embeddings: bool = False) -> dict:
+        """Re-rank over-fetched candidates with MMR and a per-repo cap.
+
+        Chunks are grouped by their `repo_name` metadata (falling back to `source`, then the chunk id).
 
         Args:
-            query (str): Natural language query to search for.
-            n_results (int): Number of top results to return.
+            query_embeddings (list): The query embedding as returned by `generate_embeddings`.
+            candidates (dict): Chroma query result for one query, including "embeddings".
+            n_results (int): Number of chunks to keep.
+            lambda_mult (float): MMR relevance / diversity trade-off.
+            max_per_repo (int): Maximum chunks per repo; None or 0 means no cap.
+            include_embeddings (bool): Keep the selected chunk embeddings in the result.
 
         Returns:
-            The raw result returned by `find_relevant_chunks`.
+            dict: A Chroma-shaped result (lists of lists) holding only the selected chunks, in selection order.
         """
-        query_embeddings = self.generate_embeddings(query)
-        relevant_chunks = self.find_relevant_chunks(
-            query_embeddings=query_embeddings,
-            n_results=n_results
+        ids = candidates["ids"][0]
+        metadatas = (candidates.get("metadatas") or [[None] * len(ids)])[0]
+        groups = [
+            (metadata or {}).get("repo_name") or (metadata or {}).get("source") or chunk_id
+            for chunk_id, metadata in zip(ids, metadatas)
+        ]
+        selected = maximal_marginal_relevance(
+            query_embeddings[0],
+            candidates["embeddings"][0],
+            k=n_results,
+            lambda_mult=lambda_mult,
+            groups=groups,
+            max_per_group=max_per_repo
         )
+
+        keys = ("ids", "documents", "metadatas", "distances", "embeddings") if include_embeddings else ("ids", "documents", "metadatas", "distances")
+        return select_rows(candidates, selected, keys)
+
+
+    def search(self, query_embeddings: list, n_results: int = 5, metrics: PipelineMetrics = None, mmr: bool = None, fetch_k: int = None, lambda_mult: float = None, max_per_repo: Optional[int] = None, include_embeddings: bool = False):
+        """Return the top chunks for an already computed query embedding.
+
+        With MMR enabled, `fetch_k` candidates are fetched and `n_results` of them are
+        picked by maximal marginal relevance with at most `max_per_repo` chunks per repo,
+        so the result covers more distinct projects than the plain nearest neighbours.
+
+        Args:
+            query_embeddings (list): Output of `generate_embeddings`.
+            n_results (int): Number of top results to return.
+            metrics (PipelineMetrics): Optional collector for the "vector_query" and "mmr" stage timings.
+            mmr (bool): Diversify the results. Defaults to config.MMR_ENABLED.
+            fetch_k (int): Candidates fetched before MMR. Defaults to config.MMR_FETCH_K.
+            lambda_mult (float): MMR trade-off. Defaults to config.MMR_LAMBDA.
+            max_per_repo (int): Per-repo cap; 0 disables it. Defaults to config.MAX_CHUNKS_PER_REPO.
+            include_embeddings (bool): Keep the chunk embeddings in the result.
+
+        Returns:
+            The raw result returned by `find_relevant_chunks` (or its diversified subset).
+        """
+        metrics = metrics if metrics is not None else PipelineMetrics()
+        mmr = config.MMR_ENABLED if mmr is None else mmr
+
+        if not mmr:
+            include = ["documents", "metadatas", "distances", "embeddings"] if include_embeddings else None
+            with metrics.stage("vector_query"):
+                relevant_chunks = self.find_relevant_chunks(
+                    query_embeddings=query_embeddings,
+                    n_results=n_results,
+                    include=include
+                )
+            return relevant_chunks
+
+        fetch_k = max(fetch_k or config.MMR_FETCH_K, n_results)
+        lambda_mult = config.MMR_LAMBDA if lambda_mult is None else lambda_mult
+        max_per_repo = config.MAX_CHUNKS_PER_REPO if max_per_repo is None else max_per_repo
+
+        with metrics.stage("vector_query"):
+            candidates = self.find_relevant_chunks(
+                query_embeddings=query_embeddings,
+                n_results=fetch_k,
+                include=["documents", "metadatas", "distances", "embeddings"]
+            )
+        with metrics.stage("mmr"):
+            relevant_chunks = self.diversify(query_embeddings, candidates, n_results, lambda_mult, max_per_repo, include_embeddings)
+        metrics.record("retrieval", "candidates", len(candidates["ids"][0]))
         return relevant_chunks
 
 
+    def ask(self, query: str, n_results: int = 5, metrics: PipelineMetrics = None, **search_kwargs):
+        """Embed a query and return top relevant chunks from the collection.
+
+        Args:
+            query (str): Natural language query to search for.
+            n_results (int): Number of top results to return.
+            metrics (PipelineMetrics): Optional collector for the "embedding", "vector_query" and "mmr" stage timings.
+            **search_kwargs: MMR options forwarded to `search` (mmr, fetch_k, lambda_mult, max_per_repo).
+
+        Returns:
+            The raw result returned by `find_relevant_chunks` (or its diversified subset).
+        """
+        metrics = metrics if metrics is not None else PipelineMetrics()
+        with metrics.stage("embedding"):
+            query_embeddings = self.generate_embeddings(query)
+        return self.search(query_embeddings, n_results=n_results, metrics=metrics, **search_kwargs)
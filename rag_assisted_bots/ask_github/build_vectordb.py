@@ -9,10 +9,20 @@ from langchain_text_splitters import RecursiveCharacterTextSplitter
 import chromadb
 from chromadb.config import Settings
 from langchain_community.document_loaders import DirectoryLoader, PyMuPDFLoader
-from sentence_transformers import SentenceTransformer
+from rag_assisted_bots.ask_github.embeddings import load_embedding_model
+from rag_assisted_bots.ask_github.index_registry import IndexRegistry, index_stamp, new_version_name, validate_index
+from rag_assisted_bots.ask_github.index_snapshot import IndexSnapshot, write_index_snapshot
+from rag_assisted_bots.ask_github.profile_cards import build_profile_card
+from rag_assisted_bots.ask_github.vectordb_access import SnapshotStore
+from rag_assisted_bots.ask_github.metadata_store import MetadataStore
+from rag_assisted_bots.ask_github import config
 import uuid
 from typing import Union
-import json
+import logging
+import os
+
+
+logger = logging.getLogger(__name__)
 
 
 class GithubBuildVectorDB:
@@ -20,37 +30,118 @@ class GithubBuildVectorDB:
 
     Args:
         directory_path (str): Path to the directory containing documents (PDFs supported).
+        metadatas_path (str): Metadata store written by the scrapers (config.METADATA_STORE_PATH).
+            A legacy metadata.json path is migrated to the .sqlite store next to it (see MetadataStore).
         embedding_model_name (str): SentenceTransformer model name to use for embeddings.
-        collection_name (str): Name of the Chroma collection to create/get.
+        collection_name (str): Name of the Chroma collection to create/get. With `versioned` this is the alias readers use.
+        embedding_backend (str): "torch", "onnx" or "onnx-int8"; defaults to config.EMBEDDING_BACKEND.
+        versioned (bool): Build into a new shadow collection and switch the alias to it in `publish()`,
+            so readers never see a half-built index. False writes into `collection_name` directly.
     """
 
 
-    def __init__(self, directory_path: str, vectordb_path:str, metadatas_path:str=None,  embedding_model_name: str = "all-MiniLM-L6-v2", collection_name: str = "my_embeddings"):
+    def __init__(self, directory_path: str, vectordb_path:str, metadatas_path:str=None,  embedding_model_name: str = "all-MiniLM-L6-v2", collection_name: str = "my_embeddings", embedding_backend: str = None, versioned: bool = True):
         self.directory_path = directory_path
         self.metadatas_path = metadatas_path
+        self.collection_name = collection_name
+        self.versioned = versioned
+        self.chunk_size = None
+        self.chunk_overlap = None
+        self.profile_collection = None
+        self.vectordb_path = vectordb_path
+        self.registry = IndexRegistry(vectordb_path)
     
         self.client = chromadb.PersistentClient(path=vectordb_path)
-        print("---------------------------vectordb_path---------------------------", vectordb_path)
+        logger.debug("vectordb_path: %s", vectordb_path)
         self.embedding_model_name = embedding_model_name
-        self.embedding_model = SentenceTransformer(embedding_model_name)
-        self.collection = self.client.get_or_create_collection(name=collection_name)
-        print("------------------self.client.list_collections()-------------------", self.client.list_collections())
+        self.embedding_model = load_embedding_model(embedding_model_name, backend=embedding_backend)
+        self._collection = None
+        logger.debug("collections: %s", self.client.list_collections())
+
+
+    @property
+    def collection(self):
+        """Collection being built. The versioned shadow collection is created on first use, so a
+        builder which only reads or exports never leaves an unpublished `<alias>__v...` behind."""
+        if self._collection is None:
+            self._collection = self._new_collection(self.collection_name)
+        return self._collection
+
+
+    @collection.setter
+    def collection(self, collection):
+        self._collection = collection
+
+
+    def _new_collection(self, alias: str):
+        """Create a new shadow collection for `alias` (versioned) or get `alias` itself."""
+        if self.versioned:
+            return self.client.create_collection(name=new_version_name(alias))
+        return self.client.get_or_create_collection(name=alias)
+
+
+    def discard(self) -> list:
+        """Delete the shadow collections this builder created but never published (e.g. after a failed build).
+
+        Returns:
+            list: Names of the deleted collections.
+        """
+        if not self.versioned:
+            return []
+        aliases = self.registry.read()["aliases"]
+        deleted = []
+        for alias, attribute in ((self.collection_name, "_collection"), (self.profile_collection_name, "profile_collection")):
+            collection = getattr(self, attribute)
+            if collection is None:
+                continue
+            entry = aliases.get(alias) or {}
+            if collection.name not in [entry.get("collection")] + entry.get("history", []):
+                try:
+                    self.client.delete_collection(name=collection.name)
+                    deleted.append(collection.name)
+                except Exception as e:
+                    logger.warning("Could not delete unpublished collection %s: %s", collection.name, e)
+            setattr(self, attribute, None)
+        return deleted
+
+
+    @property
+    def profile_collection_name(self) -> str:
+        return f"{self.collection_name}{config.PROFILE_COLLECTION_SUFFIX}"
             
 
-    def read_metadata(self) -> Union[list, None]:
-        """Read metadata from a JSON file if metadatas_path is set."""
+    def read_metadata(self, source: str = "github") -> Union[list, None]:
+        """Read the metadata of every `source` item if metadatas_path is set."""
         if not self.metadatas_path:
-            print("No metadatas_path provided; skipping metadata loading.")
+            logger.info("No metadatas_path provided; skipping metadata loading.")
             return None
 
         try:
-            with open(self.metadatas_path, 'r') as f:
-                metadatas = json.load(f)
-            print("Loaded metadata for %d documents from %s", len(metadatas), self.metadatas_path)
-            return metadatas['github']
+            metadatas = list(MetadataStore(self.metadatas_path).iter_source(source))
+            logger.info("Loaded metadata for %d documents from %s", len(metadatas), self.metadatas_path)
+            return metadatas
         except Exception as e:
-            print("Failed to read metadata from %s: %s", self.metadatas_path, e)
+            logger.error("Failed to read metadata from %s: %s", self.metadatas_path, e)
+            return None
+
+
+    def chunk_metadatas(self, document_names: list, source: str = None) -> Union[list, None]:
+        """Look up the metadata of every chunk by its source document (as returned by `split_documents`).
+
+        Each document is looked up once in the metadata store; chunks of unknown documents only get their source.
+
+        Args:
+            document_names (list): `chunk.metadata["source"]` of every chunk.
+            source (str): Restrict lookups to "github" or "medium"; None searches every source.
+
+        Returns:
+            list: One metadata dict per chunk, or None without a metadata store.
+        """
+        if not self.metadatas_path:
             return None
+        store = MetadataStore(self.metadatas_path)
+        by_document = {name: store.lookup_chunk_source(name, source=source) or {"source": name} for name in set(document_names)}
+        return [by_document[name] for name in document_names]
 
 
     def load_documents(self):
@@ -87,6 +178,8 @@ class GithubBuildVectorDB:
             separators=['\n\n', "  "]
         )
 
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
         split_doc = splitter.split_documents(documents=documents)
         document_names = []
         for chunk in split_doc:
@@ -95,6 +188,23 @@ class GithubBuildVectorDB:
         return split_doc, document_names
 
 
+    def embed_texts(self, texts: list) -> list:
+        """Encode texts with the configured embedding model.
+
+        Args:
+            texts (List[str]): Texts to embed.
+
+        Returns:
+            list: One embedding (plain Python list) per text.
+        """
+        embeddings = self.embedding_model.encode(texts)
+
+        try:
+            return embeddings.tolist()
+        except Exception:
+            return [list(vec) for vec in embeddings]
+
+
     def generate_embeddings(self, chunks: list, metadatas:list=None) -> None:
         """Generate embeddings for document chunks and add them to the Chroma collection.
 
@@ -115,12 +225,7 @@ class GithubBuildVectorDB:
             texts = [str(chunk.page_content) for chunk in chunks]
             ids = [str(uuid.uuid4()) for _ in chunks]
 
-            embeddings = self.embedding_model.encode(texts)
-
-            try:
-                embeddings = embeddings.tolist()
-            except Exception:
-                embeddings = [list(vec) for vec in embeddings]
+            embeddings = self.embed_texts(texts)
 
             self.collection.add(
                 ids=ids,
@@ -132,14 +237,223 @@ class GithubBuildVectorDB:
             raise
 
 
-    def build(self, chunks, metadatas) -> list:
+    def build_profile_cards(self, documents: list, repo_metadatas: list = None, source: str = None) -> int:
+        """Precompute one profile card per repo and store the cards in the "<collection>_profiles" collection.
+
+        Card text comes from the scraped metadata plus the technologies found in the
+        repo's documents (matched to the metadata by file name, as saved by the scrapers).
+
+        Args:
+            documents (List[Document]): Loaded documents or chunks; `metadata["source"]` identifies the repo.
+            repo_metadatas (list): Scraped metadata entries. Defaults to `read_metadata(source)`.
+            source (str): Metadata source of this collection, "github" or "medium". Required without `repo_metadatas`.
+
+        Returns:
+            int: Number of cards stored.
+        """
+        if repo_metadatas is None:
+            if source is None:
+                raise ValueError("build_profile_cards needs the metadata source of the collection (source='github' or 'medium')")
+            repo_metadatas = self.read_metadata(source)
+        if not repo_metadatas:
+            logger.info("No repo metadata available; skipping profile cards.")
+            return 0
+
+        texts_by_name = {}
+        for document in documents:
+            name = os.path.splitext(os.path.basename(document.metadata.get("source", "")))[0]
+            texts_by_name.setdefault(name, []).append(str(document.page_content))
+
+        ids, cards, card_metadatas = [], [], []
+        for repo_metadata in repo_metadatas:
+            name = repo_metadata.get("repo_name")
+            if not name:
+                continue
+            card, card_metadata = build_profile_card(repo_metadata, "\n".join(texts_by_name.get(name, [])))
+            ids.append(f"profile-{name}")
+            cards.append(card)
+            card_metadatas.append(card_metadata)
+
+        if not cards:
+            return 0
+        if self.profile_collection is None:
+            self.profile_collection = self._new_collection(self.profile_collection_name)
+        self.profile_collection.upsert(ids=ids, embeddings=self.embed_texts(cards), documents=cards, metadatas=card_metadatas)
+        logger.info("Stored %d profile cards in %s", len(cards), self.profile_collection.name)
+        return len(cards)
+
+
+    def _publish_collection(self, alias: str, collection, chunk_size, chunk_overlap, keep_versions: int) -> str:
+        """Stamp `collection` and, for versioned builds, make it the published version of `alias`."""
+        stamp = index_stamp(
+            embedding_model_name=self.embedding_model_name,
+            embedding_dim=self.embedding_model.get_sentence_embedding_dimension(),
+            chunk_size=chunk_size,
+            chunk_overlap=chunk_overlap,
+        )
+        collection.modify(metadata=stamp)
+
+        if not self.versioned:
+            return collection.name
+
+        history = self.registry.publish(alias, collection.name)
+        stale = history[max(keep_versions - 1, 0):]
+        for name in stale:
+            try:
+                self.client.delete_collection(name=name)
+            except Exception as e:
+                logger.warning("Could not delete old collection %s: %s", name, e)
+        self.registry.forget(alias, stale)
+        return collection.name
+
+
+    def publish(self, keep_versions: int = None) -> str:
+        """Stamp the collection with the embedding model, dimension and chunking parameters and make it live.
+
+        For a versioned build the alias is atomically switched to the new collection, and
+        older versions beyond `keep_versions` (current one included) are deleted. The
+        previous version is kept by default, so readers still holding it can finish.
+        Profile cards, when built, are published the same way under their own alias.
+        Afterwards the builder forgets the published collections, so a later write on the
+        same builder goes into a new shadow collection instead of the live index.
+
+        Args:
+            keep_versions (int): Number of versions to keep. Defaults to config.INDEX_KEEP_VERSIONS.
+
+        Returns:
+            str: Name of the published physical collection.
+        """
+        keep_versions = keep_versions if keep_versions is not None else config.INDEX_KEEP_VERSIONS
+        if self.profile_collection is not None:
+            self._publish_collection(self.profile_collection_name, self.profile_collection, None, None, keep_versions)
+        published = self._publish_collection(self.collection_name, self.collection, self.chunk_size, self.chunk_overlap, keep_versions)
+        if self.versioned:
+            self._collection = None
+            self.profile_collection = None
+        return published
+
+
+    def publish_snapshot(self, snapshots_path: str = None, keep: int = None) -> str:
+        """Copy the published database into a read-only snapshot for serving workers.
+
+        Call after `publish()`. Workers running RAGModel(read_only=True) on `snapshots_path`
+        switch to the new snapshot before their next question.
+
+        Args:
+            snapshots_path (str): Snapshot root. Defaults to config.VECTORDB_SNAPSHOTS_PATH.
+            keep (int): Snapshots to keep, the new one included. Defaults to config.VECTORDB_KEEP_SNAPSHOTS.
+
+        Returns:
+            str: Folder of the new snapshot.
+        """
+        store = SnapshotStore(snapshots_path or config.VECTORDB_SNAPSHOTS_PATH)
+        return store.publish(self.vectordb_path, keep=keep if keep is not None else config.VECTORDB_KEEP_SNAPSHOTS)
+
+
+    def export_snapshot(self, path: str, dtype: str = None, allow_empty: bool = False) -> dict:
+        """Write the published collection into a single-file index snapshot (see index_snapshot.py).
+
+        Serving nodes open the file with `IndexSnapshot.load` / `RAGModel.load_index_snapshot`
+        without Chroma and without rebuilding. Call after `publish()`; any builder on the same
+        `vectordb_path` exports the version readers currently see.
+
+        Args:
+            path (str): Output file.
+            dtype (str): "float16" or "int8" embeddings. Defaults to config.INDEX_SNAPSHOT_DTYPE.
+            allow_empty (bool): Write a snapshot even when the collection has no chunks.
+
+        Returns:
+            dict: The manifest written to the file.
+        """
+        collection = self.client.get_collection(name=self.registry.resolve(self.collection_name))
+        data = collection.get(include=["embeddings", "documents", "metadatas"])
+        if not data["ids"] and not allow_empty:
+            raise ValueError(f"Collection {collection.name} has no chunks; build and publish it first (or pass allow_empty=True)")
+        stamp = index_stamp(
+            embedding_model_name=self.embedding_model_name,
+            embedding_dim=self.embedding_model.get_sentence_embedding_dimension(),
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap,
+        )
+        manifest = {**stamp, **(collection.metadata or {}), "collection": self.collection_name}
+        return write_index_snapshot(
+            path,
+            ids=data["ids"],
+            embeddings=data["embeddings"],
+            documents=data["documents"],
+            metadatas=data["metadatas"],
+            manifest=manifest,
+            dtype=dtype or config.INDEX_SNAPSHOT_DTYPE,
+        )
+
+
+    def import_snapshot(self, path: str, publish: bool = True) -> int:
+        """Fill the collection from an index snapshot instead of re-embedding documents.
+
+        Args:
+            path (str): Snapshot file written by `export_snapshot`.
+            publish (bool): Call `publish()` once all chunks are stored.
+
+        Returns:
+            int: Number of chunks imported.
+        """
+        snapshot = IndexSnapshot.load(path)
+        validate_index(
+            snapshot.metadata,
+            embedding_model_name=self.embedding_model_name,
+            embedding_dim=self.embedding_model.get_sentence_embedding_dimension(),
+            collection_name=path
+        )
+        self.chunk_size = snapshot.manifest.get("chunk_size")
+        self.chunk_overlap = snapshot.manifest.get("chunk_overlap")
+
+        batch_size = self.client.get_max_batch_size()
+        try:
+            for start in range(0, snapshot.count(), batch_size):
+                rows = snapshot.get(range(start, min(start + batch_size, snapshot.count())))
+                self.collection.add(
+                    ids=rows["ids"],
+                    embeddings=rows["embeddings"].tolist(),
+                    documents=rows["documents"],
+                    metadatas=[metadata or None for metadata in rows["metadatas"]]
+                )
+            logger.info("Imported %d chunks from %s", snapshot.count(), path)
+            if publish:
+                self.publish()
+        except Exception:
+            self.discard()
+            raise
+        return snapshot.count()
+
+
+    def build(self, chunks, metadatas, publish: bool = True, profile_cards: bool = None, source: str = None) -> list:
         """High-level convenience method to build the vector DB end-to-end.
 
         Loads documents, splits them into chunks and generates embeddings which are
         stored in the configured Chroma collection.
 
+        Args:
+            publish (bool): Call `publish()` once all chunks are stored.
+            profile_cards (bool): Also build the profile card collection from `chunks` and the scraped metadata.
+                Defaults to config.PROFILE_CARDS_ENABLED.
+            source (str): Metadata source of the chunks, "github" or "medium". Profile cards are only built
+                when it is given, so a Medium collection never gets GitHub repo cards.
+
         Returns:
             List[str]: List of document names corresponding to the chunks added to the collection.
         """
-        self.generate_embeddings(chunks=chunks, metadatas=metadatas)
+        profile_cards = config.PROFILE_CARDS_ENABLED if profile_cards is None else profile_cards
+        if profile_cards and source is None:
+            logger.warning("No metadata source given to build(); skipping profile cards. Pass source='github' or source='medium' to build them.")
+            profile_cards = False
+        try:
+            self.generate_embeddings(chunks=chunks, metadatas=metadatas)
+            if profile_cards:
+                self.build_profile_cards(chunks, source=source)
+            if publish:
+                self.publish()
+        except Exception:
+            # Never leave a half-built shadow collection behind; published versions are kept.
+            self.discard()
+            raise
                 
@@ -1,18 +1,80 @@
 from pathlib import Path
+import logging
+import os
 
 # GitHub settings
 GITHUB_USERNAME = "vijaytakbhate2002"
 GITHUB_PDF_FOLDER = "rag_assisted_bot/scrapped_data/github_pdfs"
+# Scraped repo / article metadata (SQLite, see metadata_store.py); the JSON file is only read to migrate old data
+METADATA_STORE_PATH = "scrapped_metadata/metadata.sqlite"
 METADATA_JSON_PATH = "scrapped_metadata/metadata.json"
 
 # Project root as base directory
 BASE_DIR = Path(__file__).resolve().parents[1]  
 
-# Chroma vector DB path (writable in project root)
-VECTORDB_PATH = str(BASE_DIR / "vectordb")
+# Writable data directory (vector DB, snapshots, exported models), outside the installed package:
+# the per-user data dir (%LOCALAPPDATA% on Windows, $XDG_DATA_HOME or ~/.local/share elsewhere).
+# Set RAG_ASSISTED_BOTS_DATA_DIR to use another folder.
+USER_DATA_HOME = os.getenv("LOCALAPPDATA") if os.name == "nt" else os.getenv("XDG_DATA_HOME")
+DATA_DIR = Path(os.getenv("RAG_ASSISTED_BOTS_DATA_DIR") or Path(USER_DATA_HOME or Path.home() / ".local" / "share") / "rag_assisted_bots")
+# Installs from before the per-user data dir keep their database in the project root; keep using it until moved.
+LEGACY_DATA_DIR = BASE_DIR
+if not os.getenv("RAG_ASSISTED_BOTS_DATA_DIR") and (LEGACY_DATA_DIR / "vectordb").is_dir() and not (DATA_DIR / "vectordb").exists():
+    logging.getLogger(__name__).warning(
+        "Using the vector DB in %s; move it to %s (or set RAG_ASSISTED_BOTS_DATA_DIR) to stop writing into the package folder",
+        LEGACY_DATA_DIR / "vectordb", DATA_DIR / "vectordb"
+    )
+    DATA_DIR = LEGACY_DATA_DIR
+
+# Chroma vector DB path (written by the builder)
+VECTORDB_PATH = str(DATA_DIR / "vectordb")
+# Read-only serving: workers open immutable snapshots published from VECTORDB_PATH
+VECTORDB_SNAPSHOTS_PATH = str(DATA_DIR / "vectordb_snapshots")
+VECTORDB_READ_ONLY = os.getenv("RAG_ASSISTED_BOTS_READ_ONLY", "0") == "1"
+VECTORDB_KEEP_SNAPSHOTS = 2
 COLLECTION_NAME = "my_embeddings"
+# Versioned builds: published + previous collection are kept, older ones are deleted
+INDEX_KEEP_VERSIONS = 2
+# Single-file snapshots (GithubBuildVectorDB.export_snapshot): "float16" or "int8" embeddings
+INDEX_SNAPSHOT_DTYPE = "float16"
 
 # Embeddings and LLM
 EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+# "torch" (reference), "onnx" or "onnx-int8" (needs `optimum[onnxruntime]`)
+EMBEDDING_BACKEND = "torch"
+EMBEDDING_QUANTIZATION_CONFIG = "avx2"  # "avx2", "avx512", "avx512_vnni" or "arm64"
+EMBEDDING_NUM_THREADS = None  # None keeps the library default
+EMBEDDING_CACHE_DIR = str(DATA_DIR / "embedding_cache")
+EMBEDDING_PARITY_MIN_COSINE = 0.99
+EMBEDDING_PARITY_MIN_TOPK_OVERLAP = 0.9
 TOP_K_MATCHES = 4
+
+# Adaptive top-k: retrieve up to ADAPTIVE_MAX_K chunks, keep at least ADAPTIVE_MIN_K, and stop at the
+# first chunk whose cosine similarity to the question is below ADAPTIVE_MIN_SCORE, drops by more than
+# ADAPTIVE_MAX_SCORE_GAP from the previous chunk, or would exceed ADAPTIVE_CONTEXT_TOKEN_BUDGET tokens
+ADAPTIVE_TOP_K = True
+ADAPTIVE_MIN_K = 1
+ADAPTIVE_MAX_K = 8
+ADAPTIVE_MIN_SCORE = 0.25
+ADAPTIVE_MAX_SCORE_GAP = 0.08
+ADAPTIVE_CONTEXT_TOKEN_BUDGET = 700
+
+# Retrieval diversification: over-fetch MMR_FETCH_K candidates, then pick TOP_K_MATCHES by
+# maximal marginal relevance (1.0 = relevance only, 0.0 = diversity only), at most
+# MAX_CHUNKS_PER_REPO per repository / article (None = no cap)
+MMR_ENABLED = True
+MMR_FETCH_K = 20
+MMR_LAMBDA = 0.5
+MAX_CHUNKS_PER_REPO = 2
+
+# Profile cards: one compact card per repo / article, stored in "<collection>_profiles"
+# and used instead of raw chunks for broad questions ("summarize his skills")
+PROFILE_CARDS_ENABLED = True
+PROFILE_COLLECTION_SUFFIX = "_profiles"
+PROFILE_CARDS_TOP_K = 6
+
 GPT_MODEL_NAME = "gpt-5-mini"
+# "openai" uses ChatOpenAI, "fake" uses the offline FakeChatModel (benchmarks / load tests)
+LLM_BACKEND = "openai"
+# Earlier messages (questions and answers) sent with every turn, after the static instructions
+CONVERSATION_HISTORY_MESSAGES = 4
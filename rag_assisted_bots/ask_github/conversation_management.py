@@ -1,4 +1,4 @@
-from langchain_core.messages import SystemMessage
+from langchain_core.messages import SystemMessage, BaseMessage
 from typing import Union, List
 from rag_assisted_bots.ask_github.prompts import SystemPromptTemplate
 
@@ -15,26 +15,24 @@ class ConversationManager:
         self.assistant_type = assistant_type
         self.system_prompt_template = SystemPromptTemplate(assistant_type=assistant_type)
         
-    def manage(self, rag_context: Union[str, List[str]], top_k_matches: int, rag_activation: str) -> list:
+    def static_prefix(self, rag_activation: str) -> str:
+        """Instructions sent first on every turn; byte-identical for a given assistant type and RAG mode."""
+        return self.system_prompt_template.instructions(rag_activation)
+
+
+    def manage(self, rag_context: Union[str, List[str]], top_k_matches: int, rag_activation: str, history: List[BaseMessage] = None) -> list:
         """Manages the conversation based on the provided context and settings.
-         - Builds the appropriate system prompt based on RAG activation and assistant type.
-         - Initializes conversation with the system prompt.
-         - Returns the updated conversation list.
+         - Starts with the static instructions of the assistant type and RAG mode, identical on every turn,
+           so provider-side prompt caching can reuse them.
+         - Appends the earlier messages of the conversation (history), then the per-turn RAG context.
+         - Returns the updated conversation list; the caller appends the new question.
         """
-        conversation = []
+        conversation = [SystemMessage(content=self.static_prefix(rag_activation))]
+        conversation.extend(history or [])
 
         if isinstance(rag_context, list):
             rag_context = "\n\n".join(str(chunk) for chunk in rag_context)
-            
-        system_prompt_templates = {
-            "github": self.system_prompt_template.system_prompt_github,
-            "medium": self.system_prompt_template.system_prompt_medium
-        }
-        system_prompt = system_prompt_templates.get(self.assistant_type, self.system_prompt_template.system_prompt_github)(
-            rag_context=rag_context,
-            rag_activation=rag_activation,
-            top_k_matches=top_k_matches
-        )
-        conversation.append(SystemMessage(content=system_prompt.strip()))
-        return conversation
 
+        if rag_activation.lower() == "yes":
+            conversation.append(SystemMessage(content=self.system_prompt_template.context_block(rag_context, top_k_matches)))
+        return conversation
@@ -0,0 +1,196 @@
+"""Embedding model loading with selectable CPU backends.
+
+Backends:
+    "torch"     - the reference PyTorch SentenceTransformer.
+    "onnx"      - the same model exported to ONNX and run with onnxruntime.
+    "onnx-int8" - the ONNX model with dynamically int8-quantized weights.
+
+Exported ONNX artifacts are cached under `EMBEDDING_CACHE_DIR`, so the export
+only happens once per model. Use `check_embedding_parity` to verify that a
+faster backend still produces the same retrieval results as "torch".
+"""
+
+from rag_assisted_bots.ask_github import config
+from sentence_transformers import SentenceTransformer
+from pathlib import Path
+from typing import Optional
+import numpy as np
+import threading
+import tempfile
+import shutil
+import logging
+import os
+
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+_shared_models = {}
+_shared_models_lock = threading.Lock()
+
+
+def _export_dir(model_name: str, cache_dir: str) -> Path:
+    return Path(cache_dir) / model_name.replace("/", "__") / "onnx_export"
+
+
+def _onnx_file_name(export_dir: Path, quantized: bool, quantization_config: str) -> Optional[str]:
+    """Return the path (relative to export_dir) of the requested ONNX file, or None if it is not exported yet."""
+    wanted = f"model_qint8_{quantization_config}.onnx" if quantized else "model.onnx"
+    matches = sorted(export_dir.glob(f"**/{wanted}"))
+    return str(matches[0].relative_to(export_dir)) if matches else None
+
+
+def _export_onnx(model_name: str, export_dir: Path, quantized: bool, quantization_config: str) -> str:
+    """Export `model_name` to ONNX (and optionally int8) into export_dir. Returns the ONNX file name.
+
+    Every artifact is written into a temporary folder next to export_dir and moved into place with
+    `os.replace`, so workers starting at the same time never load a half-written model: they either
+    find nothing and export themselves, or find a complete file.
+    """
+    export_dir.parent.mkdir(parents=True, exist_ok=True)
+    file_name = _onnx_file_name(export_dir, quantized=False, quantization_config=quantization_config)
+    if file_name is None:
+        logger.info("Exporting %s to ONNX in %s", model_name, export_dir)
+        tmp_dir = Path(tempfile.mkdtemp(dir=export_dir.parent, prefix=".onnx_export."))
+        try:
+            onnx_model = SentenceTransformer(model_name, backend="onnx", model_kwargs={"provider": "CPUExecutionProvider"})
+            onnx_model.save_pretrained(str(tmp_dir))
+            try:
+                os.replace(tmp_dir, export_dir)
+            except OSError:
+                # Another worker moved its complete export into place first; use that one.
+                logger.info("%s was exported concurrently; using the existing export", model_name)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        file_name = _onnx_file_name(export_dir, quantized=False, quantization_config=quantization_config)
+
+    if quantized and file_name is not None:
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+        logger.info("Quantizing %s to int8 (%s)", model_name, quantization_config)
+        tmp_dir = Path(tempfile.mkdtemp(dir=export_dir.parent, prefix=".onnx_quantize."))
+        try:
+            work_dir = tmp_dir / "model"
+            shutil.copytree(export_dir, work_dir)
+            onnx_model = SentenceTransformer(str(work_dir), backend="onnx", model_kwargs={"file_name": file_name, "provider": "CPUExecutionProvider"})
+            export_dynamic_quantized_onnx_model(onnx_model, quantization_config, str(work_dir))
+            quantized_name = _onnx_file_name(work_dir, quantized=True, quantization_config=quantization_config)
+            if quantized_name is not None:
+                (export_dir / quantized_name).parent.mkdir(parents=True, exist_ok=True)
+                os.replace(work_dir / quantized_name, export_dir / quantized_name)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        file_name = _onnx_file_name(export_dir, quantized=True, quantization_config=quantization_config)
+
+    if file_name is None:
+        raise RuntimeError(f"ONNX export of {model_name} did not produce a model file in {export_dir}")
+    return file_name
+
+
+def load_embedding_model(model_name: str, backend: str = None, num_threads: int = None, cache_dir: str = None, quantization_config: str = None) -> SentenceTransformer:
+    """Load `model_name` with the selected backend.
+
+    Args:
+        model_name (str): SentenceTransformer model name, e.g. config.EMBEDDING_MODEL_NAME.
+        backend (str): "torch", "onnx" or "onnx-int8". Defaults to config.EMBEDDING_BACKEND.
+        num_threads (int): CPU threads used for inference. Defaults to config.EMBEDDING_NUM_THREADS (None = library default).
+        cache_dir (str): Folder for exported ONNX artifacts. Defaults to config.EMBEDDING_CACHE_DIR.
+        quantization_config (str): onnxruntime quantization target ("avx2", "avx512", "avx512_vnni", "arm64").
+            Defaults to config.EMBEDDING_QUANTIZATION_CONFIG.
+
+    Returns:
+        SentenceTransformer: The loaded model; `encode` works the same for every backend.
+    """
+    backend = backend or config.EMBEDDING_BACKEND
+    num_threads = num_threads if num_threads is not None else config.EMBEDDING_NUM_THREADS
+    cache_dir = cache_dir or config.EMBEDDING_CACHE_DIR
+    quantization_config = quantization_config or config.EMBEDDING_QUANTIZATION_CONFIG
+
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend '{backend}'. Expected one of: {', '.join(EMBEDDING_BACKENDS)}")
+
+    if backend == "torch":
+        if num_threads:
+            import torch
+            torch.set_num_threads(num_threads)
+        return SentenceTransformer(model_name)
+
+    import onnxruntime
+    quantized = backend == "onnx-int8"
+    export_dir = _export_dir(model_name, cache_dir)
+    file_name = _onnx_file_name(export_dir, quantized=quantized, quantization_config=quantization_config)
+    if file_name is None:
+        file_name = _export_onnx(model_name, export_dir, quantized=quantized, quantization_config=quantization_config)
+
+    session_options = onnxruntime.SessionOptions()
+    if num_threads:
+        session_options.intra_op_num_threads = num_threads
+        session_options.inter_op_num_threads = 1
+
+    return SentenceTransformer(
+        str(export_dir),
+        backend="onnx",
+        model_kwargs={"file_name": file_name, "provider": "CPUExecutionProvider", "session_options": session_options},
+    )
+
+
+def get_shared_embedding_model(model_name: str, backend: str = None) -> SentenceTransformer:
+    """Load `model_name` once per process; every caller (and thread) gets the same instance.
+
+    Serving workers use this so several RAGModels do not each hold a copy of the model.
+    """
+    key = (model_name, backend or config.EMBEDDING_BACKEND)
+    model = _shared_models.get(key)
+    if model is not None:
+        return model
+    with _shared_models_lock:
+        model = _shared_models.get(key)
+        if model is None:
+            model = load_embedding_model(model_name, backend=key[1])
+            _shared_models[key] = model
+        return model
+
+
+def check_embedding_parity(reference_model: SentenceTransformer, candidate_model: SentenceTransformer, texts: list, min_cosine: float = None, min_topk_overlap: float = None, top_k: int = 4) -> dict:
+    """Compare a candidate backend against the reference embeddings on `texts`.
+
+    Two checks are made: the cosine similarity between reference and candidate
+    vectors of the same text, and whether every text retrieves the same top-k
+    neighbours among `texts` with both models.
+
+    Args:
+        reference_model (SentenceTransformer): Usually the "torch" backend.
+        candidate_model (SentenceTransformer): Backend under test.
+        texts (list): Sample chunks or questions, at least top_k + 1 of them.
+        min_cosine (float): Smallest accepted per-text cosine similarity. Defaults to config.EMBEDDING_PARITY_MIN_COSINE.
+        min_topk_overlap (float): Smallest accepted mean top-k overlap. Defaults to config.EMBEDDING_PARITY_MIN_TOPK_OVERLAP.
+        top_k (int): Neighbourhood size for the retrieval overlap.
+
+    Returns:
+        dict: min_cosine, mean_cosine, topk_overlap (0..1) and passed (bool).
+    """
+    min_cosine = min_cosine if min_cosine is not None else config.EMBEDDING_PARITY_MIN_COSINE
+    min_topk_overlap = min_topk_overlap if min_topk_overlap is not None else config.EMBEDDING_PARITY_MIN_TOPK_OVERLAP
+    reference = np.asarray(reference_model.encode(texts, normalize_embeddings=True), dtype=np.float32)
+    candidate = np.asarray(candidate_model.encode(texts, normalize_embeddings=True), dtype=np.float32)
+
+    cosines = np.sum(reference * candidate, axis=1)
+
+    k = min(top_k, len(texts) - 1)
+    overlap = 1.0
+    if k > 0:
+        def neighbours(embeddings):
+            similarity = embeddings @ embeddings.T
+            np.fill_diagonal(similarity, -np.inf)
+            return np.argsort(-similarity, axis=1)[:, :k]
+
+        reference_nn, candidate_nn = neighbours(reference), neighbours(candidate)
+        overlap = float(np.mean([len(set(r) & set(c)) / k for r, c in zip(reference_nn, candidate_nn)]))
+
+    result = {
+        "min_cosine": round(float(cosines.min()), 6),
+        "mean_cosine": round(float(cosines.mean()), 6),
+        "topk_overlap": round(overlap, 4),
+    }
+    result["passed"] = result["min_cosine"] >= min_cosine and result["topk_overlap"] >= min_topk_overlap
+    return result
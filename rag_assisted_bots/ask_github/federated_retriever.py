@@ -0,0 +1,133 @@
+"""Federated retrieval over several collections (e.g. GitHub and Medium) in one turn.
+
+The question is embedded once, every collection is queried concurrently with
+that embedding, and the chunks are merged by cosine similarity to the query, a
+score which does not depend on each collection's distance metric. Each merged
+chunk is tagged with the name of the corpus it came from.
+"""
+
+from rag_assisted_bots.ask_github.main import RAGModel
+from rag_assisted_bots.ask_github.embeddings import get_shared_embedding_model
+from rag_assisted_bots.ask_github.metrics import PipelineMetrics
+from rag_assisted_bots.ask_github.ask_vectordb import apply_adaptive_top_k
+from rag_assisted_bots.ask_github import config
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+
+def merge_results(results_by_source: dict, query_embedding, n_results: int) -> dict:
+    """Merge Chroma-shaped results from several sources into the `n_results` best chunks.
+
+    Args:
+        results_by_source (dict): {source_name: Chroma query result including "embeddings"}.
+        query_embedding (array-like): The query vector used for all sources.
+        n_results (int): Number of chunks to keep.
+
+    Returns:
+        dict: Chroma-shaped result (lists of lists) with an extra "scores" list; every metadata
+            gets a "corpus" key naming its source.
+    """
+    query = np.asarray(query_embedding, dtype=np.float32).reshape(-1)
+    query = query / max(float(np.linalg.norm(query)), 1e-12)
+
+    rows = []
+    for source, result in results_by_source.items():
+        if not result or not result["ids"] or not result["ids"][0]:
+            continue
+        embeddings = np.asarray(result["embeddings"][0], dtype=np.float32)
+        embeddings = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        scores = embeddings @ query
+        metadatas = (result.get("metadatas") or [[None] * len(scores)])[0]
+        for index, score in enumerate(scores):
+            rows.append((
+                float(score),
+                result["ids"][0][index],
+                result["documents"][0][index],
+                {**(metadatas[index] or {}), "corpus": source},
+            ))
+
+    rows.sort(key=lambda row: row[0], reverse=True)
+    rows = rows[:n_results]
+    return {
+        "ids": [[row[1] for row in rows]],
+        "documents": [[row[2] for row in rows]],
+        "metadatas": [[row[3] for row in rows]],
+        "scores": [[round(row[0], 6) for row in rows]],
+    }
+
+
+class FederatedRetriever:
+    """Drop-in replacement for RAGModel which answers from several collections at once.
+
+    Pass it to `Assistant(rag_model=...)` so one turn (one relevance call, one answer call)
+    uses all corpora.
+
+    Args:
+        vectordb_path (str): Chroma database folder shared by the collections.
+        collections (dict): {source_name: collection name or alias}, e.g. {"github": "github", "medium": "medium"}.
+        embedding_model_name (str): Embedding model all collections were built with.
+        embedding_backend (str): "torch", "onnx" or "onnx-int8"; defaults to config.EMBEDDING_BACKEND.
+        max_workers (int): Threads used to query collections; defaults to one per collection.
+        read_only (bool): Serve snapshots from vectordb_path, see RAGModel. Defaults to config.VECTORDB_READ_ONLY.
+    """
+
+    profile_collection = None
+
+
+    def __init__(self, vectordb_path: str, collections: dict, embedding_model_name: str, embedding_backend: str = None, max_workers: int = None, read_only: bool = None):
+        if not collections:
+            raise ValueError("FederatedRetriever needs at least one collection")
+        self.vectordb_path = vectordb_path
+        self.embedding_model_name = embedding_model_name
+        self.embedding_backend = embedding_backend
+        self.models = {
+            source: RAGModel(vectordb_path=vectordb_path, collection_name=collection_name, embedding_model_name=embedding_model_name, embedding_backend=embedding_backend, read_only=read_only)
+            for source, collection_name in collections.items()
+        }
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or len(collections), thread_name_prefix="federated-retriever")
+
+
+    def build_config(self, client=None):
+        """Open every collection with the process-wide Chroma client and one shared embedding model."""
+        embedding_model = get_shared_embedding_model(self.embedding_model_name, backend=self.embedding_backend)
+        for model in self.models.values():
+            model.build_config(client=client, embedding_model=embedding_model)
+        self.asker = next(iter(self.models.values())).asker
+
+
+    def refresh(self) -> bool:
+        """Pick up newly published versions of any collection."""
+        return any([model.refresh() for model in self.models.values()])
+
+
+    def search(self, query_embeddings: list, n_results: int) -> dict:
+        """Query all collections concurrently with the same embedding and merge the results."""
+        futures = {
+            source: self.executor.submit(model.asker.search, query_embeddings, n_results=n_results, include_embeddings=True)
+            for source, model in self.models.items()
+        }
+        results = {source: future.result() for source, future in futures.items()}
+        return merge_results(results, query_embeddings[0], n_results)
+
+
+    def ask(self, question, n_results, metrics: PipelineMetrics = None, adaptive: bool = None):
+        """Same contract as RAGModel.ask: returns (documents, metadatas) for the merged top chunks.
+
+        With adaptive top-k (default config.ADAPTIVE_TOP_K) the merged chunks are cut off like RAGModel.ask does.
+        """
+        self.refresh()
+        adaptive = config.ADAPTIVE_TOP_K if adaptive is None else adaptive
+        metrics = metrics if metrics is not None else PipelineMetrics()
+        with metrics.stage("embedding"):
+            query_embeddings = self.asker.generate_embeddings(question)
+        with metrics.stage("vector_query"):
+            response = self.search(query_embeddings, n_results)
+        if adaptive:
+            response = apply_adaptive_top_k(query_embeddings[0], response, metrics=metrics, scores=response["scores"][0])
+        metrics.record("retrieval", "corpora", len(self.models))
+        return response["documents"], response["metadatas"]
+
+
+    def close(self) -> None:
+        """Stop the query threads."""
+        self.executor.shutdown(wait=False)
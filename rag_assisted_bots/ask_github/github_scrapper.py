@@ -1,15 +1,17 @@
 import requests
-import json
 import certifi
 import os
 from xhtml2pdf import pisa
 import markdown
 import os
 from dotenv import load_dotenv
+from rag_assisted_bots.ask_github.metadata_store import MetadataStore
 import logging
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 TOKEN_GITHUB = os.getenv('TOKEN_GITHUB')
 if not TOKEN_GITHUB:
     raise RuntimeError("GITHUB token not found in environment!")
@@ -28,6 +30,10 @@ class GithubScrapper:
 
 
     def __init__(self, username:str, save_folder:str, metadata_save_folder:str) -> None:
+        """
+        Args:
+            metadata_save_folder: path of the metadata store (config.METADATA_STORE_PATH)
+        """
         self.username = username
         self.github_restapi = f"https://api.github.com/users/{username}/repos?per_page=100"
         self.save_folder = save_folder
@@ -70,7 +76,7 @@ class GithubScrapper:
             repo_url = repo_info['html_url']
 
             if repo_name in self.AVOID_REPOS:
-                print(f" Skipping repo {repo_name} as it's in AVOID_REPOS list")
+                logger.info("Skipping repo %s as it's in AVOID_REPOS list", repo_name)
                 continue
 
             repo_api = f"https://api.github.com/repos/{self.username}/{repo_name}/readme"
@@ -78,11 +84,10 @@ class GithubScrapper:
             response = requests.get(repo_api, headers=self.HEADERS)
 
             if response.status_code != 200:
-                print(response.status_code)
-                print(f"❌ Failed to fetch REPO METADATA for {repo_name}")
+                logger.warning("Failed to fetch REPO METADATA for %s (status %s)", repo_name, response.status_code)
                 continue
 
-            print(f" Successfully fetched REPO METADATA for {repo_name}")
+            logger.info("Successfully fetched REPO METADATA for %s", repo_name)
 
             data = response.json()  
 
@@ -100,13 +105,8 @@ class GithubScrapper:
 
             readme_contents.append(usable_data)
         
-        with open(self.metadata_save_folder, "r", encoding="utf-8") as f:
-            metadata = json.load(f)
-        
-        metadata['github'] = readme_contents
-
-        with open(self.metadata_save_folder, "w", encoding="utf-8") as f:
-            json.dump(metadata, f, indent=4)
+        # Replaces only the github items; Medium metadata in the same store is kept.
+        MetadataStore(self.metadata_save_folder).replace_source("github", readme_contents)
 
         return readme_contents
     
@@ -120,16 +120,17 @@ class GithubScrapper:
         Return:
             None
         """
-        print("ENtered into save pdf...")
+        logger.debug("Entered into save pdf...")
         try:
             markdown_content = requests.get(repo_info['download_url']).content
             markdown_content = markdown_content.decode('utf-8')
             repo_name = repo_info['repo_name']
             repo_name = repo_name + ".pdf"
         except Exception as e:
-            return print(e)
+            logger.error("Failed to download README: %s", e)
+            return None
 
-        print(f" ............................... {repo_name} ..............................................................")
+        logger.info("Saving README of %s", repo_name)
 
         html_content = markdown.markdown(markdown_content, extensions=['extra', 'codehilite'])
 
@@ -157,18 +158,18 @@ class GithubScrapper:
         output_path = os.path.join(self.save_folder, repo_name)
 
         try:
-            print(f"Converting to PDF: {output_path}...")
+            logger.info("Converting to PDF: %s", output_path)
             with open(output_path, "wb") as pdf_file:
                 pisa_status = pisa.CreatePDF(styled_html, dest=pdf_file)
             
             if pisa_status.err:
-                print(f"Error generating PDF for {output_path}")
+                logger.error("Error generating PDF for %s", output_path)
                 return False
             
-            print(f"Successfully saved PDF to {output_path}")
+            logger.info("Successfully saved PDF to %s", output_path)
             return True
         except Exception as e:
-            print(f"Exception converting to PDF: {e}")
+            logger.exception("Exception converting to PDF: %s", e)
             return False
         
 
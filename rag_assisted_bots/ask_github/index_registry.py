@@ -0,0 +1,142 @@
+"""Versioned Chroma collections behind a stable alias.
+
+A build writes into a new physical collection (e.g. `my_embeddings__v20250101120000_ab12cd`)
+while readers keep using the currently published one. Publishing rewrites a small
+JSON pointer file next to the Chroma database with `os.replace`, so readers in
+other processes switch from one complete index to the next, never to a half-built one.
+
+Each collection is stamped with the embedding model, its dimension and the
+chunking parameters, so queries made with a different model are rejected.
+"""
+
+from typing import Optional
+import tempfile
+import time
+import uuid
+import json
+import os
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_FILE_NAME = "index_registry.json"
+
+
+def index_stamp(embedding_model_name: str, embedding_dim: int, chunk_size: Optional[int], chunk_overlap: Optional[int]) -> dict:
+    """Collection metadata describing how an index was built."""
+    stamp = {
+        "embedding_model": embedding_model_name,
+        "embedding_dim": int(embedding_dim),
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+    if chunk_size is not None:
+        stamp["chunk_size"] = int(chunk_size)
+    if chunk_overlap is not None:
+        stamp["chunk_overlap"] = int(chunk_overlap)
+    return stamp
+
+
+def validate_index(collection_metadata: Optional[dict], embedding_model_name: str, embedding_dim: int, collection_name: str = "") -> None:
+    """Raise ValueError if the collection was built with another embedding model or dimension.
+
+    Unstamped (legacy) collections are accepted with a warning.
+    """
+    if not collection_metadata or "embedding_model" not in collection_metadata:
+        logger.warning("Collection %s has no embedding stamp; cannot verify it was built with %s", collection_name, embedding_model_name)
+        return
+    if collection_metadata["embedding_model"] != embedding_model_name:
+        raise ValueError(
+            f"Collection {collection_name} was built with embedding model '{collection_metadata['embedding_model']}' "
+            f"but queries use '{embedding_model_name}'. Rebuild the index or change EMBEDDING_MODEL_NAME."
+        )
+    if int(collection_metadata.get("embedding_dim", embedding_dim)) != int(embedding_dim):
+        raise ValueError(
+            f"Collection {collection_name} has {collection_metadata['embedding_dim']}-dim vectors "
+            f"but the query model produces {embedding_dim}-dim vectors."
+        )
+
+
+def new_version_name(alias: str) -> str:
+    """Unique physical collection name for a new build of `alias`."""
+    return f"{alias}__v{time.strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:6]}"
+
+
+class IndexRegistry:
+    """Maps collection aliases to the physical collection currently being served.
+
+    Args:
+        vectordb_path (str): Chroma database folder; the pointer file is stored inside it.
+    """
+
+    def __init__(self, vectordb_path: str):
+        self.vectordb_path = vectordb_path
+        self.registry_path = os.path.join(vectordb_path, REGISTRY_FILE_NAME)
+
+
+    def read(self) -> dict:
+        """Return the whole registry, {"aliases": {alias: {"collection": ..., "history": [...]}}}."""
+        try:
+            with open(self.registry_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"aliases": {}}
+
+
+    def version_token(self) -> Optional[int]:
+        """Cheap change marker (file mtime in ns); None when nothing was published yet."""
+        try:
+            return os.stat(self.registry_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+
+    def resolve(self, alias: str) -> str:
+        """Physical collection published for `alias`, or `alias` itself for legacy unversioned collections."""
+        entry = self.read()["aliases"].get(alias)
+        return entry["collection"] if entry else alias
+
+
+    def _write(self, registry: dict) -> None:
+        """Write the registry to a temporary file and atomically replace the pointer file."""
+        os.makedirs(self.vectordb_path, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.vectordb_path, prefix=".index_registry.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(registry, f, indent=4)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.registry_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+    def publish(self, alias: str, collection_name: str) -> list:
+        """Atomically point `alias` at `collection_name`.
+
+        Returns:
+            list: Physical collection names previously published for the alias, newest first.
+        """
+        registry = self.read()
+        entry = registry["aliases"].get(alias, {"collection": None, "history": []})
+        history = [name for name in [entry["collection"]] + entry["history"] if name and name != collection_name]
+        registry["aliases"][alias] = {
+            "collection": collection_name,
+            "published_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "history": history,
+        }
+        self._write(registry)
+        logger.info("Published collection %s as %s", collection_name, alias)
+        return history
+
+
+    def forget(self, alias: str, collection_names: list) -> None:
+        """Drop `collection_names` from the history of `alias` (after they were deleted)."""
+        registry = self.read()
+        entry = registry["aliases"].get(alias)
+        if not entry:
+            return
+        entry["history"] = [name for name in entry["history"] if name not in collection_names]
+        self._write(registry)
@@ -0,0 +1,307 @@
+"""Single-file, memory-mapped index snapshots.
+
+A snapshot holds everything needed to answer queries for one collection: the
+chunk embeddings (float16, or int8 with one scale per row), chunk texts, ids,
+metadata and a manifest naming the embedding model. It is written once on the
+build node (`GithubBuildVectorDB.export_snapshot`) and opened on serving nodes
+with `IndexSnapshot.load`, which maps the file instead of reading it, so a worker
+is ready in milliseconds and all workers on a host share the same pages.
+
+File layout (all integers little endian):
+
+    b"RAGIDX01"                 magic
+    uint64                      manifest length
+    manifest                    UTF-8 JSON, lists the sections below
+    sections                    64-byte aligned arrays:
+                                embeddings (n, dim) float16 | int8
+                                scales     (n,)     float32  (int8 only)
+                                norms      (n,)     float32
+                                ids / documents / metadatas: uint64 offsets (n + 1,) and a UTF-8 blob
+"""
+
+from typing import Optional
+import numpy as np
+import tempfile
+import struct
+import time
+import json
+import os
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"RAGIDX01"
+FORMAT_VERSION = 1
+SNAPSHOT_DTYPES = ("float16", "int8")
+ALIGNMENT = 64
+# Rows scored per step in IndexSnapshot.query; bounds the float32 scratch memory of a query
+QUERY_BLOCK_ROWS = 8192
+
+
+def quantize_embeddings(embeddings, dtype: str):
+    """Convert float embeddings to the snapshot dtype.
+
+    Returns:
+        tuple: (stored array, per-row float32 scales or None, per-row float32 norms of the stored vectors)
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if embeddings.ndim != 2:
+        raise ValueError(f"Expected a 2-d embedding matrix, got shape {embeddings.shape}")
+    if dtype == "float16":
+        stored = embeddings.astype(np.float16)
+        scales = None
+        restored = stored.astype(np.float32)
+    elif dtype == "int8":
+        scales = np.maximum(np.abs(embeddings).max(axis=1), 1e-12) / 127.0
+        stored = np.clip(np.rint(embeddings / scales[:, None]), -127, 127).astype(np.int8)
+        scales = scales.astype(np.float32)
+        restored = stored.astype(np.float32) * scales[:, None]
+    else:
+        raise ValueError(f"Unknown snapshot dtype '{dtype}'. Expected one of: {', '.join(SNAPSHOT_DTYPES)}")
+    norms = np.linalg.norm(restored, axis=1).astype(np.float32)
+    return stored, scales, norms
+
+
+def _encode_strings(values: list):
+    """UTF-8 blob plus uint64 offsets (len(values) + 1) delimiting each value."""
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint64)
+    if encoded:
+        offsets[1:] = np.cumsum([len(value) for value in encoded], dtype=np.uint64)
+    return offsets, b"".join(encoded)
+
+
+def _data_offset(header_length: int) -> int:
+    end = len(MAGIC) + 8 + header_length
+    return end + (-end % ALIGNMENT)
+
+
+def write_index_snapshot(path: str, ids: list, embeddings, documents: list, metadatas: list, manifest: dict, dtype: str = "float16") -> dict:
+    """Write a snapshot file atomically (temporary file + `os.replace`).
+
+    Args:
+        path (str): Output file.
+        ids (list): Chunk ids.
+        embeddings (array-like): Float embeddings, shape (n, dim).
+        documents (list): Chunk texts.
+        metadatas (list): Chunk metadata dicts (None allowed).
+        manifest (dict): Extra manifest fields; must contain "embedding_model".
+        dtype (str): "float16" or "int8".
+
+    Returns:
+        dict: The manifest written to the file.
+    """
+    if "embedding_model" not in manifest:
+        raise ValueError("The snapshot manifest needs an 'embedding_model'")
+    if not len(ids) == len(documents) == len(metadatas) == len(embeddings):
+        raise ValueError("ids, embeddings, documents and metadatas must have the same length")
+
+    if not len(ids):
+        embeddings = np.zeros((0, int(manifest.get("embedding_dim", 0))), dtype=np.float32)
+    stored, scales, norms = quantize_embeddings(embeddings, dtype)
+    arrays = {"embeddings": stored, "norms": norms}
+    if scales is not None:
+        arrays["scales"] = scales
+    for name, values in (
+        ("ids", [str(value) for value in ids]),
+        ("documents", [value or "" for value in documents]),
+        ("metadatas", [json.dumps(value or {}, ensure_ascii=False) for value in metadatas]),
+    ):
+        arrays[f"{name}_offsets"], arrays[f"{name}_blob"] = _encode_strings(values)
+
+    manifest = {
+        **manifest,
+        "format_version": FORMAT_VERSION,
+        "count": len(ids),
+        "embedding_dim": int(stored.shape[1]),
+        "dtype": dtype,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+    }
+
+    # Section offsets are relative to the data area, which starts at the first aligned byte after the manifest.
+    sections, position = {}, 0
+    for name, value in arrays.items():
+        size = len(value) if isinstance(value, bytes) else value.nbytes
+        sections[name] = {"offset": position, "size": size}
+        if not isinstance(value, bytes):
+            sections[name].update({"dtype": value.dtype.str, "shape": list(value.shape)})
+        position += size + (-size % ALIGNMENT)
+    manifest["sections"] = sections
+
+    header = json.dumps(manifest, ensure_ascii=False).encode("utf-8")
+    data_start = _data_offset(len(header))
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".snapshot.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<Q", len(header)))
+            f.write(header)
+            f.write(b"\0" * (data_start - f.tell()))
+            for name, value in arrays.items():
+                f.seek(data_start + sections[name]["offset"])
+                f.write(value if isinstance(value, bytes) else np.ascontiguousarray(value).tobytes())
+            f.truncate(data_start + position)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    logger.info("Wrote %d-chunk %s index snapshot to %s", len(ids), dtype, path)
+    return manifest
+
+
+class IndexSnapshot:
+    """Read-only, memory-mapped view of a snapshot file.
+
+    It answers `query` like a Chroma collection (cosine distances), so it can be
+    passed as the `collection` of GithubAskToVectorDB or RAGModel.
+
+    Args:
+        path (str): Snapshot file written by `write_index_snapshot`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not an index snapshot")
+            (header_length,) = struct.unpack("<Q", f.read(8))
+            self.manifest = json.loads(f.read(header_length).decode("utf-8"))
+        self.data_offset = _data_offset(header_length)
+        if self.manifest.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported snapshot format version {self.manifest.get('format_version')} in {path}")
+
+        self._buffer = np.memmap(path, dtype=np.uint8, mode="r")
+        self.embeddings = self._array("embeddings")
+        self.norms = self._array("norms")
+        self.scales = self._array("scales") if "scales" in self.manifest["sections"] else None
+        self._strings = {name: (self._array(f"{name}_offsets"), self._bytes(f"{name}_blob")) for name in ("ids", "documents", "metadatas")}
+
+
+    @classmethod
+    def load(cls, path: str) -> "IndexSnapshot":
+        return cls(path)
+
+
+    def _bytes(self, name: str):
+        section = self.manifest["sections"][name]
+        start = self.data_offset + section["offset"]
+        return self._buffer[start:start + section["size"]]
+
+
+    def _array(self, name: str) -> np.ndarray:
+        section = self.manifest["sections"][name]
+        return self._bytes(name).view(np.dtype(section["dtype"])).reshape(section["shape"])
+
+
+    def _string(self, name: str, index: int) -> str:
+        offsets, blob = self._strings[name]
+        return bytes(blob[int(offsets[index]):int(offsets[index + 1])]).decode("utf-8")
+
+
+    @property
+    def name(self) -> str:
+        return self.manifest.get("collection") or os.path.basename(self.path)
+
+
+    @property
+    def metadata(self) -> dict:
+        """Index stamp (embedding model, dimension, chunking), as stored on Chroma collections."""
+        return {key: self.manifest[key] for key in ("embedding_model", "embedding_dim", "chunk_size", "chunk_overlap", "built_at") if key in self.manifest}
+
+
+    def count(self) -> int:
+        return int(self.manifest["count"])
+
+
+    def __len__(self) -> int:
+        return self.count()
+
+
+    def get_embeddings(self, indices=None) -> np.ndarray:
+        """Float32 embeddings for `indices` (all rows by default)."""
+        rows = self.embeddings if indices is None else self.embeddings[np.asarray(indices, dtype=np.int64)]
+        restored = rows.astype(np.float32)
+        if self.scales is not None:
+            scales = self.scales if indices is None else self.scales[np.asarray(indices, dtype=np.int64)]
+            restored *= scales[:, None]
+        return restored
+
+
+    def get(self, indices=None) -> dict:
+        """Rows as a Chroma `get`-shaped dict with ids, documents, metadatas and float32 embeddings."""
+        indices = range(self.count()) if indices is None else indices
+        return {
+            "ids": [self._string("ids", index) for index in indices],
+            "documents": [self._string("documents", index) for index in indices],
+            "metadatas": [json.loads(self._string("metadatas", index)) for index in indices],
+            "embeddings": self.get_embeddings(list(indices)),
+        }
+
+
+    def _top_k(self, queries: np.ndarray, k: int, block_rows: int):
+        """Exact top-k cosine scores of every query, scanning the rows in blocks.
+
+        Only one block is converted to float32 at a time, so a query needs
+        `block_rows * dim` floats of scratch memory whatever the snapshot size.
+
+        Returns:
+            tuple: (indices, scores), each of shape (n_queries, k), best first.
+        """
+        n_queries = queries.shape[0]
+        best_indices = np.zeros((n_queries, 0), dtype=np.int64)
+        best_scores = np.zeros((n_queries, 0), dtype=np.float32)
+        for start in range(0, self.count(), block_rows):
+            stop = min(start + block_rows, self.count())
+            scores = (self.embeddings[start:stop].astype(np.float32) @ queries.T).T
+            if self.scales is not None:
+                scores *= self.scales[start:stop]
+            scores /= np.maximum(self.norms[start:stop], 1e-12)
+
+            indices = np.concatenate([best_indices, np.broadcast_to(np.arange(start, stop), scores.shape)], axis=1)
+            scores = np.concatenate([best_scores, scores], axis=1)
+            if scores.shape[1] > k:
+                keep = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                indices = np.take_along_axis(indices, keep, axis=1)
+                scores = np.take_along_axis(scores, keep, axis=1)
+            best_indices, best_scores = indices, scores
+
+        order = np.argsort(-best_scores, axis=1, kind="stable")
+        return np.take_along_axis(best_indices, order, axis=1), np.take_along_axis(best_scores, order, axis=1)
+
+
+    def query(self, query_embeddings: list, n_results: int = 10, include: Optional[list] = None, block_rows: int = QUERY_BLOCK_ROWS) -> dict:
+        """Exact cosine search over all rows.
+
+        Returns a Chroma-shaped result (lists of lists, one per query) with cosine
+        distances (1 - cosine similarity).
+        """
+        include = include or ["documents", "metadatas", "distances"]
+        queries = np.asarray(query_embeddings, dtype=np.float32)
+        queries = queries.reshape(1, -1) if queries.ndim == 1 else queries
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+
+        k = min(n_results, self.count())
+        result = {"ids": [], **{key: [] for key in include}}
+        if k > 0:
+            top_indices, top_scores = self._top_k(queries, k, block_rows)
+        else:
+            top_indices = np.zeros((queries.shape[0], 0), dtype=np.int64)
+            top_scores = np.zeros((queries.shape[0], 0), dtype=np.float32)
+        for top, top_score in zip(top_indices, top_scores):
+            result["ids"].append([self._string("ids", index) for index in top])
+            if "documents" in include:
+                result["documents"].append([self._string("documents", index) for index in top])
+            if "metadatas" in include:
+                result["metadatas"].append([json.loads(self._string("metadatas", index)) for index in top])
+            if "distances" in include:
+                result["distances"].append([float(1.0 - score) for score in top_score])
+            if "embeddings" in include:
+                result["embeddings"].append(self.get_embeddings(top))
+        return result
@@ -0,0 +1,174 @@
+"""Chat model backends used by the Assistant.
+
+This module keeps the construction of the chat model out of `Assistant` so that
+any LangChain chat model can be injected. It also ships `FakeChatModel`, a
+deterministic local model which answers without network access. It is meant for
+benchmarks and load tests of the retrieval, prompt and session layers.
+"""
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.runnables import RunnableLambda
+from pydantic import PrivateAttr
+from rag_assisted_bots.ask_github.output_structure import InterViewResponse, RagActivation
+from typing import Any, Iterator, List, Optional
+import hashlib
+import random
+import time
+import zlib
+import re
+
+
+LINK_PATTERN = re.compile(r"https?://[^\s\"'<>)\]]+")
+
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic offline chat model with simulated latency and token streaming.
+
+    The same input always gives the same answer and the same simulated latency,
+    which keeps benchmark runs comparable between machines and releases.
+
+    Args:
+        rag_activation (str): Value returned for `RagActivation` structured output ("yes" or "no").
+        latency (float): Fixed delay in seconds added to every call, before the first token.
+        latency_jitter (float): Maximum extra delay in seconds, derived from the input text and seed.
+        tokens_per_second (float): Streaming speed. 0 disables the per-token delay.
+        seed (int): Seed mixed into the jitter so different runs can be decorrelated.
+        prompt_cache (bool): Simulate provider-side prefix caching: input tokens of leading messages
+            already seen in an earlier call are reported as `cache_read` in the usage metadata.
+    """
+
+    rag_activation: str = "yes"
+    latency: float = 0.0
+    latency_jitter: float = 0.0
+    tokens_per_second: float = 0.0
+    seed: int = 0
+    prompt_cache: bool = False
+    max_cached_prefixes: int = 10000
+    _cached_prefixes: set = PrivateAttr(default_factory=set)
+
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat-model"
+
+
+    def _messages_text(self, messages: List[BaseMessage]) -> str:
+        """Join message contents into one string, used for hashing and link extraction."""
+        return "\n".join(str(message.content) for message in messages)
+
+
+    def _sleep_before_first_token(self, messages: List[BaseMessage]) -> None:
+        """Sleep for the fixed latency plus a jitter which depends only on the input and seed."""
+        delay = self.latency
+        if self.latency_jitter > 0:
+            rng = random.Random(zlib.crc32(self._messages_text(messages).encode("utf-8")) + self.seed)
+            delay += rng.uniform(0, self.latency_jitter)
+        if delay > 0:
+            time.sleep(delay)
+
+
+    def _sleep_per_token(self) -> None:
+        if self.tokens_per_second > 0:
+            time.sleep(1.0 / self.tokens_per_second)
+
+
+    def _answer_text(self, messages: List[BaseMessage]) -> str:
+        """Build a deterministic answer from the last human message."""
+        question = ""
+        for message in reversed(messages):
+            if isinstance(message, HumanMessage):
+                question = str(message.content)
+                break
+        return f"This is a stubbed answer to: {question}".strip()
+
+
+    def _cache_read_tokens(self, messages: List[BaseMessage]) -> int:
+        """Tokens of the longest run of leading messages whose exact bytes were sent before."""
+        digest = hashlib.sha1()
+        cached, prefix_tokens, hit = 0, 0, True
+        for message in messages:
+            digest.update(f"{message.type}\0{message.content}\0".encode("utf-8"))
+            prefix_tokens += len(str(message.content).split())
+            key = digest.hexdigest()
+            if hit and key in self._cached_prefixes:
+                cached = prefix_tokens
+            else:
+                hit = False
+            if len(self._cached_prefixes) >= self.max_cached_prefixes:
+                self._cached_prefixes.clear()
+            self._cached_prefixes.add(key)
+        return cached
+
+
+    def _usage(self, messages: List[BaseMessage], text: str) -> dict:
+        """Whitespace token counts, so token accounting can be exercised offline."""
+        input_tokens = len(self._messages_text(messages).split())
+        output_tokens = len(text.split())
+        usage = {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+        if self.prompt_cache:
+            usage["input_token_details"] = {"cache_read": self._cache_read_tokens(messages)}
+        return usage
+
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        self._sleep_before_first_token(messages)
+        text = self._answer_text(messages)
+        for _ in text.split():
+            self._sleep_per_token()
+        message = AIMessage(content=text, usage_metadata=self._usage(messages, text), response_metadata={"model_name": self._llm_type})
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None, run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        self._sleep_before_first_token(messages)
+        tokens = self._answer_text(messages).split(" ")
+        for index, token in enumerate(tokens):
+            self._sleep_per_token()
+            content = token if index == 0 else " " + token
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=content))
+            if run_manager:
+                run_manager.on_llm_new_token(content, chunk=chunk)
+            yield chunk
+
+
+    def with_structured_output(self, schema, **kwargs):
+        """Return a runnable which produces `schema` instances, like ChatOpenAI does.
+
+        Supports `InterViewResponse` and `RagActivation`.
+        """
+        if schema not in (InterViewResponse, RagActivation):
+            raise ValueError(f"FakeChatModel does not support structured output for {schema}")
+
+        def structured(model_input, config=None):
+            messages = self._convert_input(model_input).to_messages()
+            text = self.invoke(messages, config=config).content
+            if schema is RagActivation:
+                return RagActivation(rag_activation=self.rag_activation)
+
+            links = list(dict.fromkeys(LINK_PATTERN.findall(self._messages_text(messages))))
+            return InterViewResponse(response_message=text, reference_links=links)
+
+        return RunnableLambda(structured)
+
+
+
+def build_chat_model(llm_backend: str, gpt_model_name: str, temperature: float, **kwargs) -> BaseChatModel:
+    """Create the chat model for the given backend name.
+
+    Args:
+        llm_backend (str): "openai" for ChatOpenAI or "fake" for FakeChatModel.
+        gpt_model_name (str): Model name passed to ChatOpenAI.
+        temperature (float): Sampling temperature passed to ChatOpenAI.
+        **kwargs: Extra keyword arguments for the backend class (e.g. `latency` for the fake model).
+
+    Returns:
+        BaseChatModel: The chat model instance.
+    """
+    if llm_backend == "openai":
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(model_name=gpt_model_name, temperature=temperature, **kwargs)
+    if llm_backend == "fake":
+        return FakeChatModel(**kwargs)
+    raise ValueError(f"Unknown llm_backend '{llm_backend}'. Expected one of: openai, fake")
@@ -1,40 +1,198 @@
 from rag_assisted_bots.ask_github.conversation_management import ConversationManager
 from rag_assisted_bots.ask_github.output_structure import InterViewResponse, RagActivation
 from rag_assisted_bots.ask_github.prompts import rag_activation_prompt
-from rag_assisted_bots.ask_github.ask_vectordb import GithubAskToVectorDB
-from rag_assisted_bots.ask_github.config import TOP_K_MATCHES, EMBEDDING_MODEL_NAME
-import chromadb
-from langchain_openai import ChatOpenAI
+from rag_assisted_bots.ask_github.ask_vectordb import GithubAskToVectorDB, apply_adaptive_top_k
+from rag_assisted_bots.ask_github.config import TOP_K_MATCHES, EMBEDDING_MODEL_NAME, LLM_BACKEND, PROFILE_CARDS_ENABLED, PROFILE_COLLECTION_SUFFIX, PROFILE_CARDS_TOP_K, VECTORDB_READ_ONLY, ADAPTIVE_TOP_K, ADAPTIVE_MAX_K, CONVERSATION_HISTORY_MESSAGES
+from rag_assisted_bots.ask_github.profile_cards import is_broad_question
+from rag_assisted_bots.ask_github.llm_backends import build_chat_model
+from rag_assisted_bots.ask_github.metrics import PipelineMetrics, emit_metrics
+from rag_assisted_bots.ask_github.index_registry import IndexRegistry, validate_index
+from rag_assisted_bots.ask_github.index_snapshot import IndexSnapshot
+from rag_assisted_bots.ask_github.vectordb_access import SnapshotStore, get_client, release_client
+from langchain_core.callbacks import UsageMetadataCallbackHandler
 from langchain_core.messages import HumanMessage, AIMessage
+import logging
+
+
+logger = logging.getLogger(__name__)
 
 
 class RAGModel:
-    """ This is VectorDB communicator which takes question as input and returns the relevant chunks from the VectorDB. """
-    def __init__(self, vectordb_path:str, collection_name:str, embedding_model_name:str):
+    """ This is VectorDB communicator which takes question as input and returns the relevant chunks from the VectorDB.
+    collection_name may be an alias published by a versioned GithubBuildVectorDB; when a new version is published
+    the model switches to it before the next question. profile_collection_name optionally names the profile card
+    collection; it is skipped when it was never built.
+    With read_only, vectordb_path is a snapshot folder (config.VECTORDB_SNAPSHOTS_PATH) filled by
+    GithubBuildVectorDB.publish_snapshot; the model serves the current snapshot and never opens the builder's database. """
+    def __init__(self, vectordb_path:str, collection_name:str, embedding_model_name:str, embedding_backend:str=None, profile_collection_name:str=None, read_only:bool=None):
         self.vectordb_path = vectordb_path
         self.collection_name = collection_name
+        self.profile_collection_name = profile_collection_name
         self.embedding_model_name = embedding_model_name
+        self.embedding_backend = embedding_backend
+        self.read_only = VECTORDB_READ_ONLY if read_only is None else read_only
+        self.snapshots = None
+        self.snapshot_token = None
+        self.active_path = None
+        self.retired_path = None
+        self.registry = None
+        self.registry_token = None
+        self.profile_collection = None
+
+
+    def _open_published_collection(self, alias:str, client, registry:IndexRegistry):
+        """ Resolve the alias to its published collection and check it was built with the query embedding model. """
+        physical_name = registry.resolve(alias)
+        collection = client.get_collection(name=physical_name)
+        validate_index(
+            collection.metadata,
+            embedding_model_name=self.embedding_model_name,
+            embedding_dim=self.asker.embedding_model.get_sentence_embedding_dimension(),
+            collection_name=physical_name
+        )
+        return collection
+
+
+    def _open_profile_collection(self, client, registry:IndexRegistry):
+        """ Open the profile card collection, or return None when it does not exist. """
+        if not self.profile_collection_name:
+            return None
+        try:
+            return self._open_published_collection(self.profile_collection_name, client, registry)
+        except ValueError:
+            raise
+        except Exception:
+            logger.info("No profile card collection %s; broad questions use regular chunks", self.profile_collection_name)
+            return None
+
+
+    def _attach(self, db_path:str, client=None):
+        """ Open the collections stored in db_path, then switch to them. """
+        client = client if client is not None else get_client(db_path)
+        registry = IndexRegistry(db_path)
+        registry_token = registry.version_token()
+        collection = self._open_published_collection(self.collection_name, client, registry)
+        profile_collection = self._open_profile_collection(client, registry)
 
+        # Single attribute assignments, so concurrent questions use either the old or the new collection.
+        self.client, self.registry, self.registry_token = client, registry, registry_token
+        self.asker.collection = collection
+        self.collection = collection
+        self.profile_collection = profile_collection
+        self.active_path = db_path
 
-    def build_config(self):
+
+    def build_config(self, client=None, embedding_model=None):
         """
         Build ChromaDB PersistentClient and get the collection. Plus initialize AskToVectorDB 
+        The client is shared by every RAGModel of the process (see vectordb_access.get_client).
+        Args:
+            client: existing chromadb client to reuse instead of the shared one (not used in read_only mode).
+            embedding_model: already loaded embedding model to share with other RAGModels.
+        Returns:
+            None
+        """
+        self.asker = GithubAskToVectorDB(collection=None, embedding_model_name=self.embedding_model_name, embedding_backend=self.embedding_backend, embedding_model=embedding_model)
+        if self.read_only:
+            if not self.vectordb_path:
+                raise ValueError("read_only RAGModel needs vectordb_path set to the snapshot folder (config.VECTORDB_SNAPSHOTS_PATH)")
+            self.snapshots = SnapshotStore(self.vectordb_path)
+            self.snapshot_token = self.snapshots.version_token()
+            self._attach(self.snapshots.current())
+        else:
+            self._attach(self.vectordb_path, client)
+
+
+    def load_index_snapshot(self, snapshot_path:str, embedding_model=None):
+        """
+        Serve from a single-file index snapshot (GithubBuildVectorDB.export_snapshot) instead of Chroma.
+        The file is memory-mapped, so this takes milliseconds and workers on one host share its pages.
+        Args:
+            snapshot_path: snapshot file.
+            embedding_model: already loaded embedding model to share with other RAGModels.
         Returns:
             None
         """
-        client = chromadb.PersistentClient(path=self.vectordb_path)
-        self.collection = client.get_collection(name=self.collection_name)
-        self.asker = GithubAskToVectorDB(collection=self.collection, embedding_model_name=self.embedding_model_name)
+        snapshot = IndexSnapshot.load(snapshot_path)
+        self.asker = GithubAskToVectorDB(collection=snapshot, embedding_model_name=self.embedding_model_name, embedding_backend=self.embedding_backend, embedding_model=embedding_model)
+        validate_index(
+            snapshot.metadata,
+            embedding_model_name=self.embedding_model_name,
+            embedding_dim=self.asker.embedding_model.get_sentence_embedding_dimension(),
+            collection_name=snapshot_path
+        )
+        self.collection = snapshot
+        self.profile_collection = None
+        self.registry = None
+        self.snapshots = None
+        self.read_only = False
+        self.active_path = snapshot_path
+
+
+    def refresh(self) -> bool:
+        """ Switch to a newly published collection version or snapshot, if any. Cheap (one stat call) when nothing changed.
+        Returns:
+            bool: True when the collection was switched.
+        """
+        if self.snapshots is not None:
+            token = self.snapshots.version_token()
+            if token == self.snapshot_token:
+                return False
+            self.snapshot_token = token
+            snapshot_path = self.snapshots.current()
+            previous_path = self.active_path
+            if snapshot_path == previous_path:
+                return False
+            self._attach(snapshot_path)
+            # The old snapshot may be pruned by the builder, so its client and sqlite handles are closed.
+            # Questions started before this switch may still be reading it; release it one switch later.
+            if self.retired_path and self.retired_path not in (snapshot_path, previous_path):
+                release_client(self.retired_path)
+            self.retired_path = previous_path
+            logger.info("Switched %s to snapshot %s", self.collection_name, snapshot_path)
+            return True
+
+        if self.registry is None or self.registry.version_token() == self.registry_token:
+            return False
+        previous = self.collection.name
+        self._attach(self.vectordb_path, self.client)
+        if self.collection.name == previous:
+            return False
+        logger.info("Switched %s to collection %s", self.collection_name, self.collection.name)
+        return True
 
     
-    def ask(self, question, n_results) -> str:
-        """ This is helper function to ask question to asked """
-        response = self.asker.ask(question, n_results=n_results) 
+    def ask(self, question, n_results, metrics:PipelineMetrics=None, adaptive:bool=None) -> str:
+        """ This is helper function to ask question to asked
+        With adaptive top-k (default config.ADAPTIVE_TOP_K) n_results is the largest k: fewer chunks are returned
+        when similarity to the question drops off or the context token budget is used (see ask_vectordb.adaptive_top_k).
+        The chosen k is recorded in metrics under retrieval "k". """
+        self.refresh()
+        adaptive = ADAPTIVE_TOP_K if adaptive is None else adaptive
+        if adaptive:
+            metrics = metrics if metrics is not None else PipelineMetrics()
+            with metrics.stage("embedding"):
+                query_embeddings = self.asker.generate_embeddings(question)
+            candidates = self.asker.search(query_embeddings, n_results=n_results, metrics=metrics, include_embeddings=True)
+            response = apply_adaptive_top_k(query_embeddings[0], candidates, metrics=metrics)
+        else:
+            response = self.asker.ask(question, n_results=n_results, metrics=metrics) 
         documents = response['documents']   
         metadatas = response['metadatas']
         return documents, metadatas
 
 
+    def ask_profiles(self, question, n_results, metrics:PipelineMetrics=None):
+        """ Return the profile cards most related to the question, in the same (documents, metadatas) shape as ask. """
+        self.refresh()
+        metrics = metrics if metrics is not None else PipelineMetrics()
+        with metrics.stage("embedding"):
+            query_embeddings = self.asker.generate_embeddings(question)
+        with metrics.stage("vector_query"):
+            response = self.profile_collection.query(query_embeddings=query_embeddings, n_results=n_results)
+        return response['documents'], response['metadatas']
+
+
 
 class Assistant:
     """ This is an LLM gpt-5-min whcih uses RAG plus resume context to answer interview questions asked by HR."""
@@ -42,30 +200,56 @@ class Assistant:
     updated_conversation = []
 
 
-    def __init__(self, gpt_model_name:str, temperature:float, collection_name:str, vectordb_path:str, rag_activated:bool, assistant_type:str="github"):
+    def __init__(self, gpt_model_name:str, temperature:float, collection_name:str, vectordb_path:str, rag_activated:bool, assistant_type:str="github", llm_backend:str=LLM_BACKEND, model=None, metrics_hooks:list=None, rag_model=None, read_only:bool=None):
+        """
+        Args:
+            llm_backend: backend name used to build the chat model ("openai" or "fake").
+            model: already built LangChain chat model. When given, it is used as is and llm_backend is ignored.
+            metrics_hooks: list of MetricsHook objects called with the PipelineMetrics of every turn.
+            rag_model: already configured retriever (e.g. FederatedRetriever over GitHub and Medium collections).
+                When given, collection_name and vectordb_path are not used.
+            read_only: serve immutable snapshots from vectordb_path (config.VECTORDB_SNAPSHOTS_PATH); defaults to config.VECTORDB_READ_ONLY.
+        """
         self.gpt_model_name = gpt_model_name
+        self.metrics_hooks = metrics_hooks or []
         self.temperature = temperature
         self.rag_activated = rag_activated
         self.assistant_type = assistant_type
         self.manager = ConversationManager(assistant_type=self.assistant_type)
-        if self.rag_activated:
+        self.history = []
+        if rag_model is not None:
+            self.rag_model = rag_model
+        elif self.rag_activated:
             self.rag_model = RAGModel(
                                     vectordb_path=vectordb_path,
                                     collection_name=collection_name,
-                                    embedding_model_name=EMBEDDING_MODEL_NAME
+                                    embedding_model_name=EMBEDDING_MODEL_NAME,
+                                    profile_collection_name=f"{collection_name}{PROFILE_COLLECTION_SUFFIX}" if PROFILE_CARDS_ENABLED else None,
+                                    read_only=read_only
                                     )
             self.rag_model.build_config()
 
-        if self.gpt_model_name:
-            self.model = ChatOpenAI(
-                                    model_name=self.gpt_model_name, 
+        if model is not None:
+            self.model = model
+        elif self.gpt_model_name:
+            self.model = build_chat_model(
+                                    llm_backend=llm_backend,
+                                    gpt_model_name=self.gpt_model_name, 
                                     temperature=self.temperature
                                     )
             
 
-    def RAG_context_fetcher(self, question:str, n_results:int) -> str:
+    def use_profile_cards(self, question:str) -> bool:
+        """ Broad questions are answered from precomputed profile cards when the card collection exists."""
+        return self.rag_model.profile_collection is not None and is_broad_question(question)
+
+    def RAG_context_fetcher(self, question:str, n_results:int, metrics:PipelineMetrics=None, use_profiles:bool=False) -> str:
         """ This function fetches context from RAG model based on question asked."""
-        documents, metadatas = self.rag_model.ask(question, n_results=n_results)
+        if use_profiles:
+            documents, metadatas = self.rag_model.ask_profiles(question, n_results=n_results, metrics=metrics)
+            context = "\n\n".join([doc for doc in documents[0]])
+            return context, metadatas
+        documents, metadatas = self.rag_model.ask(question, n_results=n_results, metrics=metrics)
         context = "\n".join([doc for doc in documents[0]])
         return context, metadatas
 
@@ -82,55 +266,93 @@ class Assistant:
         if len(lis) <= 0:
             return []
         unique_metadatas = []
-        unique_repo_names = []
+        unique_repo_names = set()
         for metadata in lis:
-            name = metadata.get("repo_name")
-            if name.strip() not in unique_repo_names:
-                unique_repo_names.append(name)
+            name = ((metadata or {}).get("repo_name") or "").strip()
+            if name not in unique_repo_names:
+                unique_repo_names.add(name)
                 unique_metadatas.append(metadata)
         return unique_metadatas
      
 
-    def chat_with_model(self, question:str) -> dict:
+    def chat_with_model(self, question:str, return_metrics:bool=False) -> dict:
         """ Takes input question and return answer of that question with updating conversation list.
-            conversation list used to make model remember last 4 conversation messages
+            the last CONVERSATION_HISTORY_MESSAGES questions and answers are sent with the question, after the static instructions
             Args:
                 question: input question                
-                assistant_type: type of assistant (github or medium)
+                return_metrics: add the per-stage timings, token counts and retrieval sizes of this turn to the result
 
             Returns:
                     dict: {
                     "response": model generated answer,
                     "rag_relevance": relevance of RAG context to question,
                     "metadatas": metadata of retrieved RAG context,
-                    "rag_context": retrieved RAG context
+                    "rag_context": retrieved RAG context,
+                    "top_k": number of chunks retrieved for this turn (chosen adaptively, see RAGModel.ask),
+                    "prompt_cache": input tokens and provider prompt-cache reads of this turn (PipelineMetrics.prompt_cache),
+                    "metrics": PipelineMetrics.as_dict() (only when return_metrics is True)
                 }"""
 
+        metrics = PipelineMetrics()
+
         conversation_model, rag_activation_chain = self.build_chains(rag_activation_prompt)
 
+        use_profiles = self.rag_activated and self.use_profile_cards(question)
+        if use_profiles:
+            n_results = PROFILE_CARDS_TOP_K
+        else:
+            n_results = ADAPTIVE_MAX_K if ADAPTIVE_TOP_K else TOP_K_MATCHES
+
         rag_context, metadatas = self.RAG_context_fetcher(
                                                     question=question,
-                                                    n_results=TOP_K_MATCHES
+                                                    n_results=n_results,
+                                                    metrics=metrics,
+                                                    use_profiles=use_profiles
                                                     ) if self.rag_activated else ("", [])
+        top_k = len(metadatas[0]) if metadatas else 0
+        metrics.record("retrieval", "chunks", top_k)
         
-        rag_activation = rag_activation_chain.invoke({"question": question, "rag_context": rag_context})
+        usage_handler = UsageMetadataCallbackHandler()
+        with metrics.stage("rag_relevance_llm"):
+            rag_activation = rag_activation_chain.invoke({"question": question, "rag_context": rag_context}, config={"callbacks": [usage_handler]})
+        metrics.record_usage("rag_relevance_llm", usage_handler)
 
-        self.updated_conversation = self.manager.manage(
-                                                        rag_context=rag_context,
-                                                        top_k_matches=TOP_K_MATCHES,                                                        
-                                                        rag_activation=rag_activation.rag_activation
-                                                    )
+        with metrics.stage("prompt_build"):
+            self.updated_conversation = self.manager.manage(
+                                                            rag_context=rag_context,
+                                                            top_k_matches=top_k,                                                        
+                                                            rag_activation=rag_activation.rag_activation,
+                                                            history=self.history
+                                                        )
+            self.updated_conversation.append(HumanMessage(question))
+        static_prefix_chars = len(self.manager.static_prefix(rag_activation.rag_activation))
+        metrics.record("prompt", "static_prefix_chars", static_prefix_chars)
+        metrics.record("prompt", "variable_chars", sum(len(str(message.content)) for message in self.updated_conversation) - static_prefix_chars)
 
-        self.updated_conversation.append(HumanMessage(question))
-        response = conversation_model.invoke(self.updated_conversation)
+        usage_handler = UsageMetadataCallbackHandler()
+        with metrics.stage("answer_llm"):
+            response = conversation_model.invoke(self.updated_conversation, config={"callbacks": [usage_handler]})
+        metrics.record_usage("answer_llm", usage_handler)
         self.updated_conversation.append(AIMessage(response.response_message))
+        self.history = (self.history + self.updated_conversation[-2:])[-CONVERSATION_HISTORY_MESSAGES:] if CONVERSATION_HISTORY_MESSAGES > 0 else []
 
-        unique_metadatas = self.remove_duplicates(metadatas[0])
-        
-        return {
+        unique_metadatas = self.remove_duplicates(metadatas[0]) if metadatas else []
+
+        metrics.record("retrieval", "source", "profile_cards" if use_profiles else "chunks")
+        metrics.record("retrieval", "n_results", n_results if self.rag_activated else 0)
+        metrics.record("retrieval", "unique_sources", len(unique_metadatas))
+        metrics.record("retrieval", "context_chars", len(rag_context))
+        emit_metrics(self.metrics_hooks, metrics)
+
+        result = {
                 "response":  response,
                 "rag_relevance": rag_activation.rag_activation,
                 "metadatas": unique_metadatas,
-                "rag_context": rag_context
+                "rag_context": rag_context,
+                "top_k": top_k,
+                "prompt_cache": metrics.prompt_cache()
         }
+        if return_metrics:
+            result["metrics"] = metrics.as_dict()
+        return result
 
@@ -0,0 +1,173 @@
+"""SQLite store for scraped repo / article metadata.
+
+Replaces the single metadata.json that every scraper read, modified and rewrote.
+Items are keyed by (source, item_id), where source is "github" or "medium" and
+item_id is the repo / article name used as the PDF file name. Each write is one
+transaction, so a crash never leaves a half-written store, and WAL mode with a
+busy timeout lets the GitHub and Medium scrapers write concurrently while the
+builder reads. Readers stream rows or look up single items by chunk source;
+nothing loads the whole store into memory.
+"""
+
+from contextlib import closing, contextmanager
+from typing import Iterator, Optional
+import sqlite3
+import time
+import json
+import os
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    source TEXT NOT NULL,
+    item_id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (source, item_id)
+);
+CREATE INDEX IF NOT EXISTS items_item_id ON items (item_id);
+"""
+
+
+def item_id_from_chunk_source(chunk_source: str) -> str:
+    """Item id of a chunk: the document file name without extension (see GithubScrapper.saveAsPDF)."""
+    return os.path.splitext(os.path.basename(chunk_source))[0]
+
+
+class MetadataStore:
+    """Upsert-capable metadata store keyed by source and repo / article id.
+
+    Args:
+        path (str): SQLite file; created with its folder on first use. A legacy metadata.json path
+            is mapped to the .sqlite file next to it, and the JSON content is imported the first time.
+        timeout (float): Seconds a writer waits for another writer's lock.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0):
+        legacy_json_path = None
+        if path.endswith(".json"):
+            legacy_json_path, path = path, os.path.splitext(path)[0] + ".sqlite"
+            logger.warning("%s is a legacy metadata.json path; using the SQLite store %s instead", legacy_json_path, path)
+        migrate = legacy_json_path is not None and os.path.exists(legacy_json_path) and not os.path.exists(path)
+
+        self.path = path
+        self.timeout = timeout
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+        if migrate:
+            logger.info("Migrated %d items from %s", self.import_json(legacy_json_path), legacy_json_path)
+
+
+    def _connect(self) -> sqlite3.Connection:
+        # One short-lived connection per call: safe across threads, processes and forks.
+        conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None)
+        conn.execute(f"PRAGMA busy_timeout = {int(self.timeout * 1000)}")
+        return conn
+
+
+    @contextmanager
+    def _transaction(self):
+        """Write transaction; BEGIN IMMEDIATE takes the write lock up front, so concurrent writers queue instead of failing."""
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+
+    def upsert(self, source: str, item_id: str, data: dict) -> None:
+        """Insert or replace one item."""
+        self.upsert_many(source, [data], id_key=None, item_ids=[item_id])
+
+
+    def upsert_many(self, source: str, items: list, id_key: str = "repo_name", item_ids: list = None) -> int:
+        """Insert or replace several items of one source in a single transaction.
+
+        Args:
+            source (str): "github", "medium", ...
+            items (list): Metadata dicts.
+            id_key (str): Item field holding the id, used when `item_ids` is not given.
+            item_ids (list): Explicit ids, one per item.
+
+        Returns:
+            int: Number of items written.
+        """
+        item_ids = item_ids if item_ids is not None else [item[id_key] for item in items]
+        now = time.time()
+        rows = [(source, str(item_id), json.dumps(item, ensure_ascii=False), now) for item_id, item in zip(item_ids, items)]
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO items (source, item_id, data, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (source, item_id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                rows,
+            )
+        return len(rows)
+
+
+    def replace_source(self, source: str, items: list, id_key: str = "repo_name") -> int:
+        """Atomically make `items` the full content of `source`; items of other sources are untouched."""
+        now = time.time()
+        rows = [(source, str(item[id_key]), json.dumps(item, ensure_ascii=False), now) for item in items]
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM items WHERE source = ?", (source,))
+            conn.executemany("INSERT OR REPLACE INTO items (source, item_id, data, updated_at) VALUES (?, ?, ?, ?)", rows)
+        logger.info("Stored %d %s metadata items in %s", len(rows), source, self.path)
+        return len(rows)
+
+
+    def delete(self, source: str, item_id: str) -> bool:
+        """Remove one item. Returns True if it existed."""
+        with self._transaction() as conn:
+            return conn.execute("DELETE FROM items WHERE source = ? AND item_id = ?", (source, str(item_id))).rowcount > 0
+
+
+    def get(self, source: str, item_id: str) -> Optional[dict]:
+        """One item, or None."""
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT data FROM items WHERE source = ? AND item_id = ?", (source, str(item_id))).fetchone()
+        return json.loads(row[0]) if row else None
+
+
+    def lookup_chunk_source(self, chunk_source: str, source: str = None) -> Optional[dict]:
+        """Metadata of the document a chunk came from (chunk.metadata["source"] is the PDF path)."""
+        item_id = item_id_from_chunk_source(chunk_source)
+        if source is not None:
+            return self.get(source, item_id)
+        with closing(self._connect()) as conn:
+            row = conn.execute("SELECT data FROM items WHERE item_id = ? ORDER BY updated_at DESC LIMIT 1", (item_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+
+    def iter_source(self, source: str) -> Iterator[dict]:
+        """Stream the items of `source` in id order, one row at a time."""
+        with closing(self._connect()) as conn:
+            for (data,) in conn.execute("SELECT data FROM items WHERE source = ? ORDER BY item_id", (source,)):
+                yield json.loads(data)
+
+
+    def sources(self) -> list:
+        with closing(self._connect()) as conn:
+            return [row[0] for row in conn.execute("SELECT DISTINCT source FROM items ORDER BY source")]
+
+
+    def count(self, source: str = None) -> int:
+        with closing(self._connect()) as conn:
+            if source is None:
+                return conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+            return conn.execute("SELECT COUNT(*) FROM items WHERE source = ?", (source,)).fetchone()[0]
+
+
+    def import_json(self, json_path: str, id_key: str = "repo_name") -> int:
+        """Load a legacy metadata.json ({"github": [...], "medium": [...]}) into the store."""
+        with open(json_path, "r", encoding="utf-8") as f:
+            legacy = json.load(f)
+        return sum(self.upsert_many(source, items, id_key=id_key) for source, items in legacy.items())
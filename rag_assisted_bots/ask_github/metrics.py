@@ -0,0 +1,173 @@
+"""Per-turn latency and usage instrumentation for the chat pipeline.
+
+`PipelineMetrics` collects stage timings (embedding, vector query, LLM calls ...),
+token usage and retrieval sizes for one chat turn. Hooks receive the finished
+metrics object, so they can forward it to logs, a custom callback or
+OpenTelemetry spans. Collection only costs a few `perf_counter` calls per turn,
+so it is always on; hooks are only called when configured.
+"""
+
+from langchain_core.callbacks import UsageMetadataCallbackHandler
+from contextlib import contextmanager
+from typing import Callable, Optional
+import logging
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class PipelineMetrics:
+    """Collects metrics of a single chat turn.
+
+    Attributes:
+        stages (list): (stage_name, start_time_ns, duration_seconds) tuples in start order.
+        values (dict): Sectioned values, e.g. {"retrieval": {"chunks": 4}, "tokens": {...}}.
+    """
+
+    def __init__(self):
+        self.stages = []
+        self.values = {}
+
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the wrapped block as stage `name`."""
+        start_ns = time.time_ns()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, start_ns, time.perf_counter() - start))
+
+
+    def record(self, section: str, key: str, value) -> None:
+        """Store `value` under values[section][key]."""
+        self.values.setdefault(section, {})[key] = value
+
+
+    def record_usage(self, stage: str, usage_handler: UsageMetadataCallbackHandler) -> None:
+        """Store token usage collected by `usage_handler` for an LLM stage.
+
+        Usage is summed over all models the handler saw. `cache_read_tokens` is the
+        part of the input served from the provider-side prompt cache.
+        """
+        usage = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0, "cache_read_tokens": 0}
+        for model_usage in usage_handler.usage_metadata.values():
+            usage["input_tokens"] += model_usage.get("input_tokens", 0)
+            usage["output_tokens"] += model_usage.get("output_tokens", 0)
+            usage["total_tokens"] += model_usage.get("total_tokens", 0)
+            usage["cache_read_tokens"] += (model_usage.get("input_token_details") or {}).get("cache_read", 0)
+        self.record("tokens", stage, usage)
+
+
+    def prompt_cache(self) -> dict:
+        """Input tokens and the part served from the provider-side prompt cache, over all LLM stages and per stage."""
+        def summary(usages):
+            input_tokens = sum(usage["input_tokens"] for usage in usages)
+            cache_read_tokens = sum(usage["cache_read_tokens"] for usage in usages)
+            return {
+                "input_tokens": input_tokens,
+                "cache_read_tokens": cache_read_tokens,
+                "hit_rate": round(cache_read_tokens / input_tokens, 4) if input_tokens else 0.0,
+            }
+
+        tokens = self.values.get("tokens", {})
+        return {**summary(tokens.values()), "stages": {stage: summary([usage]) for stage, usage in tokens.items()}}
+
+
+    def stage_durations_ms(self) -> dict:
+        """Stage durations in milliseconds; repeated stages are summed."""
+        durations = {}
+        for name, _, seconds in self.stages:
+            durations[name] = durations.get(name, 0.0) + seconds * 1000.0
+        return {name: round(ms, 3) for name, ms in durations.items()}
+
+
+    def as_dict(self) -> dict:
+        """Plain dictionary view, suitable for JSON and for the chat result."""
+        result = {"stages_ms": self.stage_durations_ms()}
+        result.update({section: dict(values) for section, values in self.values.items()})
+
+        result["prompt_cache"] = self.prompt_cache()
+        return result
+
+
+
+class MetricsHook:
+    """Base class for metrics hooks. Subclasses override `on_turn`."""
+
+    def on_turn(self, metrics: PipelineMetrics) -> None:
+        raise NotImplementedError
+
+
+
+class CallbackMetricsHook(MetricsHook):
+    """Calls `callback(metrics_dict)` after every turn, e.g. to update a Prometheus registry.
+
+    Args:
+        callback (Callable[[dict], None]): Receives `PipelineMetrics.as_dict()`.
+    """
+
+    def __init__(self, callback: Callable[[dict], None]):
+        self.callback = callback
+
+    def on_turn(self, metrics: PipelineMetrics) -> None:
+        self.callback(metrics.as_dict())
+
+
+
+class LoggingMetricsHook(MetricsHook):
+    """Logs the metrics of every turn with the standard logging module."""
+
+    def __init__(self, logger_name: str = __name__, level: int = logging.INFO):
+        self.logger = logging.getLogger(logger_name)
+        self.level = level
+
+    def on_turn(self, metrics: PipelineMetrics) -> None:
+        self.logger.log(self.level, "chat turn metrics: %s", metrics.as_dict())
+
+
+
+class OpenTelemetryMetricsHook(MetricsHook):
+    """Exports every turn as an OpenTelemetry trace: one "chat_turn" span with a child span per stage.
+
+    Args:
+        tracer: OpenTelemetry tracer. Defaults to `trace.get_tracer("rag_assisted_bots")`.
+    """
+
+    def __init__(self, tracer=None):
+        from opentelemetry import trace
+        self.trace = trace
+        self.tracer = tracer or trace.get_tracer("rag_assisted_bots")
+
+    def on_turn(self, metrics: PipelineMetrics) -> None:
+        if not metrics.stages:
+            return
+        turn_start = min(start_ns for _, start_ns, _ in metrics.stages)
+        turn_end = max(start_ns + int(seconds * 1e9) for _, start_ns, seconds in metrics.stages)
+
+        root = self.tracer.start_span("chat_turn", start_time=turn_start)
+        for section, values in metrics.values.items():
+            for key, value in values.items():
+                if isinstance(value, dict):
+                    for sub_key, sub_value in value.items():
+                        root.set_attribute(f"{section}.{key}.{sub_key}", sub_value)
+                elif isinstance(value, (str, bool, int, float)):
+                    root.set_attribute(f"{section}.{key}", value)
+
+        context = self.trace.set_span_in_context(root)
+        for name, start_ns, seconds in metrics.stages:
+            span = self.tracer.start_span(name, context=context, start_time=start_ns)
+            span.end(end_time=start_ns + int(seconds * 1e9))
+        root.end(end_time=turn_end)
+
+
+
+def emit_metrics(hooks: Optional[list], metrics: PipelineMetrics) -> None:
+    """Send `metrics` to every hook. A failing hook is logged and never breaks the chat turn."""
+    for hook in hooks or []:
+        try:
+            hook.on_turn(metrics)
+        except Exception:
+            logger.exception("Metrics hook %r failed", hook)
@@ -0,0 +1,96 @@
+"""Compact per-repo profile cards, precomputed once at index time.
+
+A card condenses the scraped metadata of one repository (name, language,
+description, links, dates) and the technologies mentioned in its README into a
+few lines. Broad questions ("summarize his skills") are answered from these
+cards instead of from many raw chunks.
+"""
+
+from collections import Counter
+from typing import Tuple
+import re
+
+
+KNOWN_TECHNOLOGIES = (
+    "Python", "Java", "JavaScript", "TypeScript", "SQL", "C++",
+    "FastAPI", "Flask", "Django", "Streamlit", "Gradio", "React",
+    "Docker", "Kubernetes", "Terraform", "GitHub Actions", "Jenkins", "AWS", "Azure", "GCP",
+    "MLflow", "DVC", "Airflow", "Kubeflow", "Prefect", "Evidently",
+    "PyTorch", "TensorFlow", "Keras", "scikit-learn", "XGBoost", "LightGBM", "CatBoost",
+    "Pandas", "NumPy", "Spark", "Hadoop", "Kafka",
+    "LangChain", "LangGraph", "OpenAI", "Hugging Face", "Transformers", "ChromaDB", "FAISS", "RAG",
+    "PostgreSQL", "MySQL", "MongoDB", "Redis", "SQLite",
+    "NLP", "Computer Vision", "OpenCV", "Power BI", "Tableau",
+)
+
+TECHNOLOGY_PATTERNS = [
+    (technology, re.compile(r"(?<![\w+#])" + re.escape(technology) + r"(?![\w+#])", re.IGNORECASE))
+    for technology in KNOWN_TECHNOLOGIES
+]
+
+PORTFOLIO_NOUNS = r"(projects?|repos|repositories|skills?|articles|experience|profile|work|career|expertise|strengths|achievements|background|portfolio)"
+QUESTION_FILLERS = r"(of|for|about|and|me|a|an|the|his|your|him|himself|yourself|vijay('s)?|all|entire|whole|overall|professional|technical|main|key|top|briefly|please|in (general|short|brief)|so far)"
+
+# A broad phrase only counts when nothing but fillers and portfolio nouns follow it up to the end of
+# the sentence: "summarize his skills" is broad, "summarize his skills in Docker and AWS" is not.
+BROAD_QUESTION_TAIL = r"(\s+(" + QUESTION_FILLERS + "|" + PORTFOLIO_NOUNS + r"))*(?=\s*([?.!,;:]|$))"
+
+BROAD_QUESTION_PATTERN = re.compile(
+    r"\b(summar\w*|overview|(overall|all (of )?(his|the|your)) " + PORTFOLIO_NOUNS +
+    r"|what (are|is) (his|your) skills?|skill ?set|tech(nology)? stack|portfolio"
+    r"|(his|your) (professional |technical )?background|tell me about (him|yourself|vijay))" + BROAD_QUESTION_TAIL,
+    re.IGNORECASE,
+)
+
+
+def extract_technologies(text: str, top_n: int = 6) -> list:
+    """Return up to `top_n` known technologies mentioned in `text`, most frequent first."""
+    counts = Counter()
+    for technology, pattern in TECHNOLOGY_PATTERNS:
+        hits = len(pattern.findall(text))
+        if hits:
+            counts[technology] = hits
+    return [technology for technology, _ in counts.most_common(top_n)]
+
+
+def build_profile_card(repo_metadata: dict, text: str = "", max_description_chars: int = 200) -> Tuple[str, dict]:
+    """Build the card text and its Chroma metadata for one repository or article.
+
+    Args:
+        repo_metadata (dict): One entry of the scraped metadata (see GithubScrapper.getRepoInfo).
+        text (str): Full text of the repo README / article, used to find key technologies.
+        max_description_chars (int): Descriptions are truncated to this length.
+
+    Returns:
+        tuple: (card text, metadata dict without None values).
+    """
+    technologies = extract_technologies(text)
+    language = repo_metadata.get("language")
+    if language and language not in technologies and language != "English":
+        technologies = [language] + technologies[:5]
+
+    description = (repo_metadata.get("description") or "").strip()
+    if len(description) > max_description_chars:
+        description = description[:max_description_chars].rsplit(" ", 1)[0] + "..."
+
+    lines = [f"Project: {repo_metadata.get('repo_name')}"]
+    if language:
+        lines.append(f"Language: {language}")
+    if description:
+        lines.append(f"Description: {description}")
+    if technologies:
+        lines.append(f"Key technologies: {', '.join(technologies)}")
+    if repo_metadata.get("repository_url"):
+        lines.append(f"Link: {repo_metadata['repository_url']}")
+    if repo_metadata.get("pushed_at"):
+        lines.append(f"Last updated: {repo_metadata['pushed_at']}")
+
+    metadata = {key: value for key, value in repo_metadata.items() if value is not None and isinstance(value, (str, int, float, bool))}
+    metadata["key_technologies"] = ", ".join(technologies)
+    metadata["profile_card"] = True
+    return "\n".join(lines), metadata
+
+
+def is_broad_question(question: str) -> bool:
+    """True for portfolio-wide questions which profile cards answer better than raw chunks."""
+    return bool(BROAD_QUESTION_PATTERN.search(question))
@@ -0,0 +1,173 @@
+"""Process-safe access to the Chroma database for serving workers.
+
+Two pieces:
+
+- `get_client` returns one Chroma client per (process, path), shared by all
+  threads of a worker. The cache is cleared in forked children, so gunicorn
+  workers never reuse sqlite connections opened by the master process.
+- `SnapshotStore` holds immutable copies of a built database. The builder
+  process copies its finished database into a new snapshot folder and flips a
+  small pointer file with `os.replace`; serving workers open the current
+  snapshot read-only and switch to a newer one between questions. Workers
+  therefore never share a sqlite file with a writer.
+"""
+
+from chromadb.api.client import SharedSystemClient
+from datetime import datetime
+from typing import Optional
+import chromadb
+import threading
+import tempfile
+import shutil
+import uuid
+import time
+import json
+import os
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+CURRENT_FILE_NAME = "CURRENT.json"
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def _reset_after_fork() -> None:
+    """Forget clients inherited from the parent process; they hold its sqlite connections."""
+    global _clients_lock
+    _clients.clear()
+    _clients_lock = threading.Lock()
+    SharedSystemClient.clear_system_cache()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def get_client(path: str):
+    """Return the Chroma PersistentClient for `path`, opened once per process and shared across threads."""
+    path = os.path.abspath(path)
+    client = _clients.get(path)
+    if client is not None:
+        return client
+    with _clients_lock:
+        client = _clients.get(path)
+        if client is None:
+            client = chromadb.PersistentClient(path=path)
+            _clients[path] = client
+        return client
+
+
+def release_client(path: str) -> None:
+    """Drop the cached client for `path` (e.g. a snapshot that was pruned) and stop its Chroma system.
+
+    Chroma keeps one System per persist directory in `SharedSystemClient`, which holds the sqlite
+    connections; evicting it closes them, so deleted snapshot folders are not kept open.
+    Only call it once no thread queries collections of `path` any more.
+    """
+    path = os.path.abspath(path)
+    # Chroma has no public API to drop one cached System; its private registry is used when present.
+    systems = getattr(SharedSystemClient, "_identifier_to_system", None)
+    with _clients_lock:
+        _clients.pop(path, None)
+        system = systems.pop(path, None) if isinstance(systems, dict) else None
+    if not isinstance(systems, dict):
+        logger.warning("This chromadb version has no SharedSystemClient._identifier_to_system cache; the Chroma system of %s stays open", path)
+    if system is not None:
+        try:
+            system.stop()
+        except Exception as e:
+            logger.warning("Could not stop the Chroma system of %s: %s", path, e)
+
+
+class SnapshotStore:
+    """Immutable, versioned copies of a Chroma database folder.
+
+    Layout:
+        <snapshots_path>/CURRENT.json        pointer to the snapshot being served
+        <snapshots_path>/<version>/          one complete Chroma database per version
+
+    Args:
+        snapshots_path (str): Root folder of the snapshots, outside the installed package.
+    """
+
+    def __init__(self, snapshots_path: str):
+        self.snapshots_path = snapshots_path
+        self.current_path = os.path.join(snapshots_path, CURRENT_FILE_NAME)
+
+
+    def version_token(self) -> Optional[int]:
+        """Cheap change marker (pointer file mtime in ns); None when nothing was published yet."""
+        try:
+            return os.stat(self.current_path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+
+    def current(self) -> str:
+        """Folder of the snapshot currently being served."""
+        try:
+            with open(self.current_path, "r", encoding="utf-8") as f:
+                version = json.load(f)["version"]
+        except FileNotFoundError:
+            raise FileNotFoundError(f"No vector DB snapshot published in {self.snapshots_path}; run the builder and publish_snapshot() first")
+        return os.path.join(self.snapshots_path, version)
+
+
+    def versions(self) -> list:
+        """Published snapshot versions, oldest first."""
+        if not os.path.isdir(self.snapshots_path):
+            return []
+        return sorted(
+            name for name in os.listdir(self.snapshots_path)
+            if not name.startswith(".") and os.path.isdir(os.path.join(self.snapshots_path, name))
+        )
+
+
+    def publish(self, vectordb_path: str, keep: int = 2) -> str:
+        """Copy a finished database into a new snapshot and make it current.
+
+        The copy is made in a hidden temporary folder and renamed into place, so
+        a snapshot folder is always complete before the pointer references it.
+
+        Args:
+            vectordb_path (str): Database folder written by GithubBuildVectorDB.
+            keep (int): Number of snapshots to keep, the new one included.
+
+        Returns:
+            str: Folder of the new snapshot.
+        """
+        os.makedirs(self.snapshots_path, exist_ok=True)
+        version = f"{datetime.now().strftime('%Y%m%d%H%M%S%f')}_{uuid.uuid4().hex[:6]}"
+        tmp_dir = tempfile.mkdtemp(dir=self.snapshots_path, prefix=".building.")
+        try:
+            shutil.copytree(vectordb_path, os.path.join(tmp_dir, "db"))
+            final_dir = os.path.join(self.snapshots_path, version)
+            os.replace(os.path.join(tmp_dir, "db"), final_dir)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        fd, tmp_pointer = tempfile.mkstemp(dir=self.snapshots_path, prefix=".current.", suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": version, "published_at": time.strftime("%Y-%m-%dT%H:%M:%S%z")}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_pointer, self.current_path)
+        logger.info("Published vector DB snapshot %s", final_dir)
+
+        self.prune(keep)
+        return final_dir
+
+
+    def prune(self, keep: int = 2) -> list:
+        """Delete the oldest snapshots beyond `keep`, never the current one. Returns the deleted versions."""
+        current = os.path.basename(self.current())
+        old = [version for version in self.versions() if version != current]
+        stale = old[:max(len(old) - max(keep - 1, 0), 0)]
+        for version in stale:
+            path = os.path.join(self.snapshots_path, version)
+            release_client(path)
+            shutil.rmtree(path, ignore_errors=True)
+        return stale
@@ -2,9 +2,9 @@ from importlib_metadata import metadata
 from xhtml2pdf import pisa
 import feedparser
 from typing import Union
-import json
 import cloudscraper
 import re
+from rag_assisted_bots.ask_github.metadata_store import MetadataStore
 
 
 class NameFormatter:
@@ -107,7 +107,7 @@ class MediumDataCollector(NameFormatter):
         
 
     def save_data(self, pdf_folder_path: str, metadata_file_path: str):
-        """Saves the formatted html data in pdf format, plus save the metadata into a json format"""
+        """Saves the formatted html data in pdf format, plus saves the metadata into the metadata store (metadata_file_path)"""
         data = self.format_pdf_html()
         if data:
             for details in data['medium']:
@@ -117,13 +117,12 @@ class MediumDataCollector(NameFormatter):
                 with open(output_path, "wb") as pdf_file:
                     pisa_status = pisa.CreatePDF(styled_html, dest=pdf_file)
 
-            with open(metadata_file_path, "w") as f:
-                metadata = {'medium': []}
-           
-                for item in data['medium']:
-                    item.pop("full_html_content", None)
-                    metadata['medium'].append(item)
-                json.dump(metadata, f)
+            metadata = []
+            for item in data['medium']:
+                item.pop("full_html_content", None)
+                metadata.append(item)
+            # Replaces only the medium items; GitHub metadata in the same store is kept.
+            MetadataStore(metadata_file_path).replace_source("medium", metadata)
     
 
 
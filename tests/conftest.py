@@ -0,0 +1,4 @@
+import os
+
+# The GitHub scraper is imported by the package __init__ and requires a token; tests never call it.
+os.environ.setdefault("TOKEN_GITHUB", "test-placeholder")
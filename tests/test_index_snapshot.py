@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+from rag_assisted_bots.ask_github.index_snapshot import IndexSnapshot, write_index_snapshot
+
+
+MANIFEST = {"embedding_model": "test-model", "chunk_size": 200, "chunk_overlap": 50}
+
+
+def make_rows(n: int = 50, dim: int = 16, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    embeddings = rng.standard_normal((n, dim)).astype(np.float32)
+    ids = [f"chunk-{index}" for index in range(n)]
+    documents = [f"document {index} é" for index in range(n)]
+    metadatas = [None if index % 3 == 0 else {"repo_name": f"repo{index}", "stars": index} for index in range(n)]
+    return ids, embeddings, documents, metadatas
+
+
+def exact_ranking(embeddings, query, k):
+    scores = embeddings @ query / (np.linalg.norm(embeddings, axis=1) * np.linalg.norm(query))
+    order = np.argsort(-scores, kind="stable")[:k]
+    return order, scores[order]
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+def test_round_trip(tmp_path, dtype):
+    ids, embeddings, documents, metadatas = make_rows()
+    path = str(tmp_path / f"index.{dtype}.ragidx")
+    write_index_snapshot(path, ids, embeddings, documents, metadatas, MANIFEST, dtype=dtype)
+
+    snapshot = IndexSnapshot.load(path)
+    assert snapshot.count() == len(ids)
+    assert snapshot.manifest["dtype"] == dtype
+    assert snapshot.metadata["embedding_model"] == "test-model"
+
+    rows = snapshot.get()
+    assert rows["ids"] == ids
+    assert rows["documents"] == documents
+    assert rows["metadatas"] == [metadata or {} for metadata in metadatas]
+    tolerance = 1e-2 if dtype == "float16" else 5e-2
+    assert np.allclose(rows["embeddings"], embeddings, atol=tolerance * np.abs(embeddings).max())
+
+
+@pytest.mark.parametrize("dtype", ["float16", "int8"])
+@pytest.mark.parametrize("block_rows", [7, 8192])
+def test_query_matches_exact_cosine(tmp_path, dtype, block_rows):
+    ids, embeddings, documents, metadatas = make_rows(n=200, dim=32)
+    path = str(tmp_path / "index.ragidx")
+    write_index_snapshot(path, ids, embeddings, documents, metadatas, MANIFEST, dtype=dtype)
+    snapshot = IndexSnapshot.load(path)
+
+    queries = np.random.default_rng(1).standard_normal((3, 32)).astype(np.float32)
+    result = snapshot.query(queries, n_results=5, include=["documents", "metadatas", "distances"], block_rows=block_rows)
+
+    restored = snapshot.get_embeddings()
+    for row, query in enumerate(queries):
+        order, scores = exact_ranking(restored, query, 5)
+        assert result["ids"][row] == [ids[index] for index in order]
+        assert result["documents"][row] == [documents[index] for index in order]
+        assert np.allclose(result["distances"][row], 1.0 - scores, atol=1e-5)
+        # Quantization may only swap near ties compared to the float32 ranking.
+        float_order, _ = exact_ranking(embeddings, query, 5)
+        assert len(set(order) & set(float_order)) >= 4
+
+
+def test_empty_snapshot(tmp_path):
+    path = str(tmp_path / "empty.ragidx")
+    write_index_snapshot(path, [], [], [], [], {**MANIFEST, "embedding_dim": 16})
+    snapshot = IndexSnapshot.load(path)
+
+    assert snapshot.count() == 0
+    assert snapshot.get()["ids"] == []
+    result = snapshot.query([np.ones(16, dtype=np.float32)], n_results=4)
+    assert result["ids"] == [[]]
+    assert result["distances"] == [[]]
+
+
+def test_rejects_other_files(tmp_path):
+    path = tmp_path / "not_a_snapshot.bin"
+    path.write_bytes(b"0" * 64)
+    with pytest.raises(ValueError):
+        IndexSnapshot.load(str(path))
@@ -0,0 +1,40 @@
+import pytest
+
+from rag_assisted_bots.ask_github.profile_cards import is_broad_question
+
+
+@pytest.mark.parametrize("question", [
+    "Summarize his skills",
+    "Can you summarize his work experience?",
+    "Give me a summary of his projects",
+    "summary of vijay's career",
+    "Give me an overview of his projects.",
+    "Give me an overview",
+    "What is his background?",
+    "Tell me about his professional background.",
+    "What is his overall experience?",
+    "What are his skills?",
+    "What's his skill set?",
+    "What is his tech stack?",
+    "Walk me through his portfolio",
+    "Tell me about yourself",
+])
+def test_broad_questions(question):
+    assert is_broad_question(question)
+
+
+@pytest.mark.parametrize("question", [
+    "Summarize his skills in Docker and AWS",
+    "Summarize the README of rag_assisted_bot",
+    "Give me an overview of his Kafka pipeline",
+    "What's his background in Kubernetes?",
+    "Describe your background with Docker",
+    "How is the overall latency of the API?",
+    "What are his skills in machine learning?",
+    "What are all his projects using Docker?",
+    "Which portfolio project uses Kafka?",
+    "What does his FastAPI repo do?",
+    "Is that all?",
+])
+def test_topic_specific_questions(question):
+    assert not is_broad_question(question)